@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class BarcodeConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'barcode'
+
+    def ready(self):
+        from . import catalog  # noqa: F401 - registers the catalog invalidation signal handlers
+
+    def warm_up(self):
+        from .catalog import load_catalog
+
+        print(f"🍾 {load_catalog()} bottle SKUs cached")
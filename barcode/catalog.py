@@ -0,0 +1,69 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, pre_save
+from django.dispatch import receiver
+
+from .models import Bottle
+
+# Bottles rarely change and saves invalidate their entry, so this is only a safety net.
+BOTTLE_CATALOG_TTL = getattr(settings, "BOTTLE_CATALOG_TTL", 24 * 60 * 60)
+
+# Cached for SKUs without a bottle, so unknown bottles do not hit the database on every scan.
+MISSING = "missing"
+
+
+def _key(sku):
+    return f"bottle_catalog:{sku}"
+
+
+def get_bottle(sku):
+    """Return the Bottle for `sku` (the oldest one if the SKU is duplicated), or None."""
+    if not sku:
+        return None
+
+    bottle = cache.get(_key(sku))
+    if bottle is None:
+        bottle = Bottle.objects.filter(sku=sku).order_by('id').first() or MISSING
+        cache.set(_key(sku), bottle, BOTTLE_CATALOG_TTL)
+    return None if bottle == MISSING else bottle
+
+
+def load_catalog():
+    """Put every bottle in the cache at once; returns the number of SKUs."""
+    catalog = {}
+    # Newest first, so the oldest bottle of a duplicated SKU ends up in the catalog.
+    for bottle in Bottle.objects.order_by('-id').iterator(chunk_size=2000):
+        catalog[_key(bottle.sku)] = bottle
+    cache.set_many(catalog, BOTTLE_CATALOG_TTL)
+    return len(catalog)
+
+
+def invalidate_bottle(*skus):
+    cache.delete_many([_key(sku) for sku in skus if sku])
+
+
+@receiver(pre_save, sender=Bottle)
+def remember_old_sku(sender, instance, **kwargs):
+    # The SKU may change on save; the entry under the old one has to go as well.
+    instance._catalog_old_sku = (
+        Bottle.objects.filter(pk=instance.pk).values_list('sku', flat=True).first() if instance.pk else None
+    )
+
+
+def bottle_changed(bottle):
+    """
+    Called by Bottle.save once refresh_variants has stored the image variants.
+
+    A post_save receiver would run too early: in autocommit mode its on_commit
+    fires inside super().save(), and a scan during the WebP encoding would cache
+    the bottle without variants.
+    """
+    skus = (bottle.sku, getattr(bottle, '_catalog_old_sku', None))
+    transaction.on_commit(lambda: invalidate_bottle(*skus))
+
+
+@receiver(post_delete, sender=Bottle)
+def bottle_deleted(sender, instance, **kwargs):
+    sku = instance.sku
+    transaction.on_commit(lambda: invalidate_bottle(sku))
@@ -0,0 +1,68 @@
+import hashlib
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+# Variants are written next to the uploads under a content-hashed name, so a
+# URL never changes meaning and nginx can serve it with an immutable cache header.
+VARIANTS = {
+    "thumb": (256, 256),
+    "medium": (768, 768),
+}
+VARIANT_DIR = "bottle/variants/"
+WEBP_QUALITY = 80
+
+
+def generate_variants(image_field):
+    """Write every WebP variant of an uploaded image and return `{name: storage path}`."""
+    image_field.open("rb")
+    try:
+        data = image_field.read()
+    finally:
+        image_field.close()
+
+    digest = hashlib.sha256(data).hexdigest()[:20]
+    paths = {name: f"{VARIANT_DIR}{digest}-{w}x{h}.webp" for name, (w, h) in VARIANTS.items()}
+    missing = [name for name, path in paths.items() if not default_storage.exists(path)]
+    if not missing:
+        return paths
+
+    with Image.open(BytesIO(data)) as original:
+        image = ImageOps.exif_transpose(original)
+        image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+
+        for name in missing:
+            variant = image.copy()
+            variant.thumbnail(VARIANTS[name], Image.Resampling.LANCZOS)
+            buffer = BytesIO()
+            variant.save(buffer, "WEBP", quality=WEBP_QUALITY, method=6)
+            default_storage.save(paths[name], ContentFile(buffer.getvalue()))
+
+    return paths
+
+
+def refresh_variants(bottle, force=False):
+    """Bring `bottle.image_variants` in line with `bottle.image`; returns True if it changed."""
+    if not bottle.image:
+        variants = {}
+    elif not force and bottle.image_variants.get("source") == bottle.image.name:
+        return False
+    else:
+        variants = {"source": bottle.image.name, **generate_variants(bottle.image)}
+
+    if variants == bottle.image_variants:
+        return False
+
+    bottle.image_variants = variants
+    type(bottle).objects.filter(pk=bottle.pk).update(image_variants=variants)
+    return True
+
+
+def variant_urls(bottle):
+    return {
+        name: default_storage.url(path)
+        for name, path in bottle.image_variants.items()
+        if name in VARIANTS
+    }
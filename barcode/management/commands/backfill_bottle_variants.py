@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from barcode.catalog import invalidate_bottle
+from barcode.images import refresh_variants
+from barcode.models import Bottle
+
+
+class Command(BaseCommand):
+    help = "Generate the thumbnail/WebP variants for bottles uploaded before the image pipeline existed."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--force", action="store_true", help="Regenerate variants that already exist.")
+
+    def handle(self, *args, **options):
+        updated = failed = 0
+        for bottle in Bottle.objects.exclude(image="").exclude(image__isnull=True).iterator(chunk_size=200):
+            try:
+                if refresh_variants(bottle, force=options["force"]):
+                    invalidate_bottle(bottle.sku)
+                    updated += 1
+            except (OSError, ValueError) as exc:
+                failed += 1
+                self.stderr.write(f"Bottle {bottle.pk} ({bottle.image.name}): {exc}")
+
+        self.stdout.write(self.style.SUCCESS(f"Updated {updated} bottles, {failed} failed."))
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('barcode', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bottle',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from .images import refresh_variants
 
 class Bottle(models.Model):
     MATERIAL_CHOICES = [
@@ -11,6 +12,14 @@ class Bottle(models.Model):
     image = models.ImageField(upload_to="bottle/images/", null=True, blank=True)
     material = models.CharField(max_length=20, choices=MATERIAL_CHOICES)
     sku = models.CharField(max_length=16)
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
+
+    def save(self, *args, **kwargs):
+        from .catalog import bottle_changed
+
+        super().save(*args, **kwargs)
+        refresh_variants(self)
+        bottle_changed(self)
 
     def __str__(self):
         return f"{self.name} ({self.material})"
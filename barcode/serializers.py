@@ -1,8 +1,17 @@
 from rest_framework import serializers
+from .images import variant_urls
 from .models import Bottle
 
 
 class BarcodeSerializer(serializers.ModelSerializer):
+    image_variants = serializers.SerializerMethodField()
+
+    def get_image_variants(self, obj):
+        urls = variant_urls(obj)
+        request = self.context.get("request")
+        if request is not None:
+            urls = {name: request.build_absolute_uri(url) for name, url in urls.items()}
+        return urls
 
     class Meta:
         model = Bottle
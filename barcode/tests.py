@@ -1,3 +1,117 @@
-from django.test import TestCase
+import shutil
+import tempfile
+from io import BytesIO
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from .catalog import get_bottle, load_catalog
+from .images import VARIANT_DIR, VARIANTS, variant_urls
+from .models import Bottle
+
+
+LOCMEM_CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "barcode-tests"}}
+
+
+def png(size=(1200, 600), color=(200, 30, 30)):
+    buffer = BytesIO()
+    Image.new("RGB", size, color).save(buffer, "PNG")
+    return SimpleUploadedFile("bottle.png", buffer.getvalue(), content_type="image/png")
+
+
+class BottleImageVariantTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def bottle(self, image=None):
+        return Bottle.objects.create(size=0.5, name="Water", material="P", sku="4780000000012", image=image)
+
+    def test_upload_gets_every_variant(self):
+        bottle = self.bottle(png())
+
+        stored = Bottle.objects.get(pk=bottle.pk).image_variants
+        self.assertEqual(stored["source"], bottle.image.name)
+        for name, (width, height) in VARIANTS.items():
+            self.assertTrue(stored[name].startswith(VARIANT_DIR))
+            with default_storage.open(stored[name]) as file, Image.open(file) as variant:
+                self.assertEqual(variant.format, "WEBP")
+                self.assertLessEqual(variant.width, width)
+                self.assertLessEqual(variant.height, height)
+        self.assertEqual(set(variant_urls(bottle)), set(VARIANTS))
+
+    def test_same_image_reuses_the_variants(self):
+        first, second = self.bottle(png()), self.bottle(png())
+        self.assertNotEqual(first.image.name, second.image.name)
+        self.assertEqual(
+            {name: first.image_variants[name] for name in VARIANTS},
+            {name: second.image_variants[name] for name in VARIANTS},
+        )
+
+    def test_save_without_image_change_does_not_regenerate(self):
+        bottle = self.bottle(png())
+        variants = dict(bottle.image_variants)
+        for name in VARIANTS:
+            default_storage.delete(variants[name])
+
+        bottle.name = "Sparkling water"
+        bottle.save()
+        self.assertEqual(bottle.image_variants, variants)
+        self.assertFalse(default_storage.exists(variants["thumb"]))
+
+    def test_new_image_replaces_the_variants(self):
+        bottle = self.bottle(png())
+        old = dict(bottle.image_variants)
+
+        bottle.image = png(color=(30, 30, 200))
+        bottle.save()
+        self.assertEqual(Bottle.objects.get(pk=bottle.pk).image_variants["source"], bottle.image.name)
+        self.assertNotEqual(bottle.image_variants["thumb"], old["thumb"])
+
+    def test_removed_image_drops_the_variants(self):
+        bottle = self.bottle(png())
+        bottle.image = None
+        bottle.save()
+        self.assertEqual(Bottle.objects.get(pk=bottle.pk).image_variants, {})
+        self.assertEqual(variant_urls(bottle), {})
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class BottleCatalogTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.bottle = Bottle.objects.create(size=0.5, name="Water", material="P", sku="4780000000012")
+
+    def test_lookups_are_cached(self):
+        self.assertEqual(get_bottle("4780000000012"), self.bottle)
+        self.assertIsNone(get_bottle("4780000000029"))
+        with self.assertNumQueries(0):
+            self.assertEqual(get_bottle("4780000000012"), self.bottle)
+            self.assertIsNone(get_bottle("4780000000029"))
+
+    def test_oldest_bottle_wins_for_a_duplicated_sku(self):
+        Bottle.objects.create(size=1.5, name="Big water", material="P", sku="4780000000012")
+        self.assertEqual(load_catalog(), 1)
+        self.assertEqual(get_bottle("4780000000012"), self.bottle)
+
+    def test_save_refreshes_old_and_new_sku(self):
+        get_bottle("4780000000012")
+        get_bottle("4780000000029")
+
+        self.bottle.sku = "4780000000029"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.bottle.save()
+        self.assertIsNone(get_bottle("4780000000012"))
+        self.assertEqual(get_bottle("4780000000029").pk, self.bottle.pk)
+
+    def test_delete_drops_the_entry(self):
+        get_bottle("4780000000012")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.bottle.delete()
+        self.assertIsNone(get_bottle("4780000000012"))
@@ -2,6 +2,7 @@ from rest_framework import viewsets
 from rest_framework.views import APIView
 from rest_framework.response import Response
 
+from .catalog import get_bottle
 from .models import Bottle
 from .serializers import BarcodeSerializer
 
@@ -13,9 +14,9 @@ class BarcodeViewSet(viewsets.ModelViewSet):
 class CheckBottleAPIView(APIView):
     def post(self, request, format=None):
         sku = request.data.get('sku')
-        try:
-            bottle = Bottle.objects.get(sku=sku)
-            material = bottle.material
-            return Response({'exists': True, 'bottle': BarcodeSerializer(bottle).data, 'material': material})
-        except Bottle.DoesNotExist:
-            return Response({'exists': False, "material": "R"})
\ No newline at end of file
+        bottle = get_bottle(sku)
+        if bottle is None:
+            return Response({'exists': False, "material": "R"})
+
+        material = bottle.material
+        return Response({'exists': True, 'bottle': BarcodeSerializer(bottle, context={'request': request}).data, 'material': material})
\ No newline at end of file
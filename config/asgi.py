@@ -6,9 +6,13 @@ from device.routing import websocket_urlpatterns
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
 
-application = ProtocolTypeRouter({
+from . import warmup  # noqa: E402 - reads settings
+
+application = warmup.WarmupMiddleware(ProtocolTypeRouter({
     "http": get_asgi_application(),
     "websocket": AuthMiddlewareStack(
         URLRouter(websocket_urlpatterns)
     ),
-})
+}))
+
+warmup.start()
@@ -0,0 +1,35 @@
+"""
+Channel layer presets selected with the CHANNEL_LAYER_BACKEND environment variable.
+
+- memory: single process only (local runs, tests)
+- redis:  channels_redis list-based layer, the default
+- pubsub: channels_redis pub/sub layer, lower fan-out latency, no persistence
+
+Both Redis layers consistent-hash every group and channel over the configured
+hosts, so listing several hosts in CHANNEL_REDIS_HOSTS shards the `device_*` and
+`session_*` groups across them. Every worker must list the hosts in the same order.
+"""
+from django.core.exceptions import ImproperlyConfigured
+
+BACKENDS = {
+    "memory": "channels.layers.InMemoryChannelLayer",
+    "redis": "channels_redis.core.RedisChannelLayer",
+    "pubsub": "channels_redis.pubsub.RedisPubSubChannelLayer",
+}
+
+
+def parse_hosts(value):
+    """Split "redis://a:6379/0,redis://b:6379/0" into a host list."""
+    return [host.strip() for host in value.split(",") if host.strip()]
+
+
+def channel_layer_config(backend, hosts):
+    if backend not in BACKENDS:
+        raise ImproperlyConfigured(
+            f"Unknown channel layer backend {backend!r}, expected one of {', '.join(BACKENDS)}"
+        )
+    if backend == "memory":
+        return {"BACKEND": BACKENDS[backend]}
+    if not hosts:
+        raise ImproperlyConfigured(f"The {backend!r} channel layer needs at least one Redis host")
+    return {"BACKEND": BACKENDS[backend], "CONFIG": {"hosts": hosts}}
@@ -0,0 +1,37 @@
+from django.core.cache import cache
+from django.db import connection
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from . import warmup
+
+
+class HealthAPIView(APIView):
+    authentication_classes = []
+    permission_classes = [AllowAny]
+    schema = None
+
+
+class LivenessAPIView(HealthAPIView):
+    """200 once the worker has finished warming up."""
+
+    def get(self, request, format=None):
+        return Response(warmup.status(), status=200 if warmup.is_ready() else 503)
+
+
+class ReadinessAPIView(HealthAPIView):
+    """200 once warmed up and while the database and the cache answer; 503 again while draining."""
+
+    def get(self, request, format=None):
+        status = warmup.status()
+        if not status["ready"]:
+            return Response(status, status=503)
+
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            cache.get("warmup:ping")
+        except Exception as e:
+            return Response({**status, "ready": False, "error": str(e)}, status=503)
+        return Response(status)
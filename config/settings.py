@@ -10,8 +10,11 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
+from config.channel_layers import channel_layer_config, parse_hosts
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -79,13 +82,60 @@ WSGI_APPLICATION = 'config.wsgi.application'
 ASGI_APPLICATION = 'config.asgi.application'
 
 
+# Channel layer: "memory" (single node / tests), "redis" or "pubsub". Several
+# comma-separated CHANNEL_REDIS_HOSTS shard the groups across those servers.
+CHANNEL_LAYER_BACKEND = os.environ.get("CHANNEL_LAYER_BACKEND", "redis")
+CHANNEL_REDIS_HOSTS = parse_hosts(os.environ.get("CHANNEL_REDIS_HOSTS", "redis://127.0.0.1:6379"))
+
 CHANNEL_LAYERS = {
-    "default": {
-        "BACKEND": "channels_redis.core.RedisChannelLayer",
-        "CONFIG": {"hosts": [("127.0.0.1", 6379)]},
-    },
+    "default": channel_layer_config(CHANNEL_LAYER_BACKEND, CHANNEL_REDIS_HOSTS),
 }
 
+# Shared cache: session details, event logs. Set CACHE_REDIS_URL in production so
+# every worker sees the same entries; without it each process keeps its own.
+CACHE_REDIS_URL = os.environ.get("CACHE_REDIS_URL")
+
+if CACHE_REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": CACHE_REDIS_URL,
+        },
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        },
+    }
+
+# Seconds without a scan after which an active session is closed automatically.
+SESSION_IDLE_TIMEOUT = 60
+
+# Repeated scans of the same SKU in one session within this many milliseconds
+# are dropped before any database work. Point SCAN_DEBOUNCE_REDIS_URL at Redis
+# to share the window between workers.
+SCAN_DEBOUNCE_WINDOW_MS = int(os.environ.get("SCAN_DEBOUNCE_WINDOW_MS", 300))
+SCAN_DEBOUNCE_REDIS_URL = os.environ.get("SCAN_DEBOUNCE_REDIS_URL")
+
+# Closed sessions older than this many days are moved to ArchivedSession by
+# `manage.py archive_sessions`.
+SESSION_ARCHIVE_AFTER_DAYS = 90
+
+# How long (seconds) the detail snapshot of an active session lives in the cache.
+SESSION_DETAIL_ACTIVE_TTL = 60
+
+# Resumable session streams: how many encoded events each session keeps for
+# replay after a reconnect, and for how long (seconds).
+SESSION_EVENT_LOG_SIZE = 100
+SESSION_EVENT_LOG_TTL = 60 * 60
+
+# Bottle catalog entries in the cache (seconds); saves and deletes invalidate them.
+BOTTLE_CATALOG_TTL = 24 * 60 * 60
+
+# Seconds between retries of a failed startup warm-up step (see config/warmup.py).
+WARMUP_RETRY_DELAY = 2
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'rest_framework_simplejwt.authentication.JWTAuthentication',
@@ -21,6 +21,8 @@ from django.urls import path, include
 from rest_framework_simplejwt.views import TokenRefreshView, TokenVerifyView
 from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView, SpectacularRedocView
 
+from .health import LivenessAPIView, ReadinessAPIView
+
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -28,6 +30,9 @@ urlpatterns = [
     path("api/", include('device.urls')),
     path("api/auth/", include('users.urls')),
 
+    path('healthz/live', LivenessAPIView.as_view(), name='health-live'),
+    path('healthz/ready', ReadinessAPIView.as_view(), name='health-ready'),
+
     path('schema/', SpectacularAPIView.as_view(), name='schema'),
     path('docs/swagger/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
     path('docs/redoc/', SpectacularRedocView.as_view(url_name='schema'), name='redoc'),
@@ -0,0 +1,214 @@
+"""
+Startup warm-up for the ASGI workers.
+
+`start()` is called when config.asgi is imported, so only the web server warms up
+(not migrate or other management commands). It runs in a background thread: the
+project-wide steps below first, then the `warm_up()` method of every app config
+that has one. The database step only checks that the database answers; its
+connection is per thread and not reused by requests. Steps that fail (Redis or the database not up yet) are retried
+until they pass, and the health endpoints report 503 until then.
+
+The channel layer keeps one connection pool per event loop, so it cannot be
+warmed from that thread. `WarmupMiddleware` does it on the loop that serves the
+requests: on `lifespan.startup` for servers that send it, otherwise on the first
+connection (daphne has no lifespan support; the readiness probe is that first
+connection, and it stays 503 until the step is done).
+
+On DRAIN_SIGNAL (sent by `manage.py serve` before it stops a worker) the worker
+reports 503 on readiness and runs the callbacks registered with `on_drain` on the
+serving loop, so open WebSockets can be closed cleanly while it still runs.
+"""
+import asyncio
+import signal
+import threading
+import time
+
+from channels.layers import get_channel_layer
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections, connections
+from django.urls import get_resolver
+
+WARMUP_RETRY_DELAY = getattr(settings, "WARMUP_RETRY_DELAY", 2)
+
+LOOP_STEP = "channel_layer"
+
+DRAIN_SIGNAL = signal.SIGUSR1
+
+_state = {"started_at": None, "finished_at": None, "pending": [], "errors": {}}
+_ready = threading.Event()
+_loop_ready = threading.Event()
+_draining = threading.Event()
+_drain_callbacks = []
+_loop = None
+_lock = threading.Lock()
+
+
+def check_database():
+    """
+    Only a reachability check: nothing opened here is reused.
+
+    Django connections belong to the thread that opened them and are closed at
+    the end of every request (CONN_MAX_AGE is 0), and under ASGI each request
+    runs in a thread of its own. This step just keeps the worker unready until
+    every database answers.
+    """
+    for alias in connections:
+        with connections[alias].cursor() as cursor:
+            cursor.execute("SELECT 1")
+
+
+def warm_cache():
+    # Opens the Redis connection pool, shared by every thread of the process.
+    cache.set("warmup:ping", 1, 60)
+    if cache.get("warmup:ping") != 1:
+        raise RuntimeError("Cache did not return the value just written")
+
+
+def warm_urls():
+    # Imports every view, serializer and their dependencies instead of the first request doing it.
+    get_resolver().url_patterns
+
+
+def steps():
+    found = [
+        ("database", check_database),
+        ("cache", warm_cache),
+        ("urls", warm_urls),
+    ]
+    for app_config in apps.get_app_configs():
+        if callable(getattr(app_config, "warm_up", None)):
+            found.append((app_config.label, app_config.warm_up))
+    return found
+
+
+def warm_up():
+    pending = steps()
+    _state["pending"] = [name for name, _ in pending]
+    while pending:
+        failed = []
+        for name, step in pending:
+            started = time.monotonic()
+            try:
+                step()
+            except Exception as e:
+                _state["errors"][name] = str(e)
+                failed.append((name, step))
+                print(f"❌ Warm-up step {name} failed: {e}")
+            else:
+                _state["errors"].pop(name, None)
+                print(f"🔥 Warm-up step {name} done in {(time.monotonic() - started) * 1000:.0f} ms")
+            finally:
+                close_old_connections()
+
+        pending = failed
+        _state["pending"] = [name for name, _ in pending]
+        if pending:
+            time.sleep(WARMUP_RETRY_DELAY)
+
+    _state["finished_at"] = time.time()
+    _ready.set()
+    print(f"✅ Warm-up finished in {_state['finished_at'] - _state['started_at']:.1f}s")
+
+
+async def warm_channel_layer():
+    """Open the channel layer connections of the running loop; returns True once they work."""
+    started = time.monotonic()
+    try:
+        await get_channel_layer().group_send("warmup", {"type": "warmup.ping"})
+    except Exception as e:
+        _state["errors"][LOOP_STEP] = str(e)
+        print(f"❌ Warm-up step {LOOP_STEP} failed: {e}")
+        return False
+
+    _state["errors"].pop(LOOP_STEP, None)
+    _loop_ready.set()
+    print(f"🔥 Warm-up step {LOOP_STEP} done in {(time.monotonic() - started) * 1000:.0f} ms")
+    return True
+
+
+class WarmupMiddleware:
+    """Outermost ASGI app: answers lifespan events and warms the channel layer on the serving loop."""
+
+    def __init__(self, app):
+        self.app = app
+        self.task = None
+        self.retry_at = 0
+
+    async def __call__(self, scope, receive, send):
+        global _loop
+        _loop = asyncio.get_running_loop()
+        if scope["type"] == "lifespan":
+            return await self.lifespan(receive, send)
+        self.warm_loop()
+        return await self.app(scope, receive, send)
+
+    def warm_loop(self):
+        if _loop_ready.is_set() or (self.task and not self.task.done()) or time.monotonic() < self.retry_at:
+            return
+        self.retry_at = time.monotonic() + WARMUP_RETRY_DELAY
+        self.task = asyncio.ensure_future(warm_channel_layer())
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await warm_channel_layer()
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+
+def on_drain(callback):
+    """Register a coroutine function to run on the serving loop once the worker starts draining."""
+    _drain_callbacks.append(callback)
+    return callback
+
+
+def drain():
+    """Stop reporting ready and run the drain callbacks; safe to call from a signal handler."""
+    if _draining.is_set():
+        return
+    _draining.set()
+    print("🚰 Draining")
+    if _loop is not None:
+        _loop.call_soon_threadsafe(_run_drain_callbacks)
+
+
+def _run_drain_callbacks():
+    for callback in _drain_callbacks:
+        asyncio.ensure_future(callback())
+
+
+def start():
+    with _lock:
+        if _state["started_at"] is not None:
+            return
+        _state["started_at"] = time.time()
+    try:
+        signal.signal(DRAIN_SIGNAL, lambda signum, frame: drain())
+    except ValueError:
+        pass  # Not imported from the main thread; the server does not send the signal then either.
+    threading.Thread(target=warm_up, name="warmup", daemon=True).start()
+
+
+def is_ready():
+    return _ready.is_set() and _loop_ready.is_set()
+
+
+def is_draining():
+    return _draining.is_set()
+
+
+def status():
+    pending = list(_state["pending"])
+    if not _loop_ready.is_set():
+        pending.append(LOOP_STEP)
+    return {
+        "ready": is_ready() and not is_draining(),
+        "draining": is_draining(),
+        "pending": pending,
+        "errors": dict(_state["errors"]),
+    }
@@ -1,5 +1,37 @@
 from django.contrib import admin
-from .models import Device, Session, SessionItem
+from django.core.paginator import Paginator
+from django.db import connection
+from django.db.models import Q
+from django.urls import reverse
+from django.utils.functional import cached_property
+from django.utils.html import format_html
+from .models import ArchivedSession, Device, Session, SessionItem
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Avoids a full `COUNT(*)` on the session tables.
+
+    Unfiltered lists on PostgreSQL use the planner's row estimate; filtered lists
+    count at most `count_cap` rows, which is plenty to draw the page links.
+    """
+
+    count_cap = 10000
+
+    @cached_property
+    def count(self):
+        query = self.object_list.query
+        if not query.where and connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT reltuples::bigint FROM pg_class WHERE relname = %s",
+                    [self.object_list.model._meta.db_table],
+                )
+                row = cursor.fetchone()
+            if row and row[0] > self.count_cap:
+                return row[0]
+        return self.object_list[:self.count_cap].count()
+
 
 @admin.register(Device)
 class DeviceAdmin(admin.ModelAdmin):
@@ -8,13 +40,92 @@ class DeviceAdmin(admin.ModelAdmin):
     readonly_fields = ("created_at",)
 
 
-class SessionItemInline(admin.TabularInline):
-    model = SessionItem
-    extra = 1
-
 @admin.register(Session)
 class SessionAdmin(admin.ModelAdmin):
-    inlines = [SessionItemInline]
-    list_display = ("id", "device", "phone_number", "status", "start_time", "end_time")
-    search_fields = ("device__name", "phone_number")
-    readonly_fields = ("start_time", "end_time")
\ No newline at end of file
+    list_display = ("id", "device", "phone_number", "status", "start_time", "end_time", "items_link")
+    list_select_related = ("device",)
+    list_filter = ("status",)
+    date_hierarchy = "start_time"
+    search_fields = ("phone_number",)
+    search_help_text = "Phone number prefix, exact device serial number or session id"
+    raw_id_fields = ("device",)
+    readonly_fields = ("start_time", "end_time", "items_link")
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    @admin.display(description="Items")
+    def items_link(self, obj):
+        if obj.pk is None:
+            return "-"
+        url = reverse("admin:device_sessionitem_changelist")
+        return format_html('<a href="{}?session__id__exact={}">View items</a>', url, obj.pk)
+
+    def get_search_results(self, request, queryset, search_term):
+        # Only lookups the indexes can answer: no LIKE '%...%' scans or joined searches.
+        term = search_term.strip()
+        if not term:
+            return queryset, False
+
+        # Resolve the serial first: an OR across the joined device table cannot use either index.
+        device_ids = list(Device.objects.filter(serial_number=term).values_list('id', flat=True))
+        lookup = Q(phone_number__startswith=term) | Q(device_id__in=device_ids)
+        if term.isdigit():
+            lookup |= Q(id=int(term))
+        return queryset.filter(lookup), False
+
+
+@admin.register(SessionItem)
+class SessionItemAdmin(admin.ModelAdmin):
+    list_display = ("id", "session", "sku", "score", "timestamp")
+    list_select_related = ("session",)
+    date_hierarchy = "timestamp"
+    search_fields = ("session__id",)
+    search_help_text = "Session id"
+    list_per_page = 100
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_search_results(self, request, queryset, search_term):
+        term = search_term.strip()
+        if not term:
+            return queryset, False
+        if not term.isdigit():
+            return queryset.none(), False
+        return queryset.filter(session_id=int(term)), False
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(ArchivedSession)
+class ArchivedSessionAdmin(admin.ModelAdmin):
+    list_display = ("id", "device", "phone_number", "item_count", "start_time", "end_time", "archived_at")
+    list_select_related = ("device",)
+    date_hierarchy = "start_time"
+    search_fields = ("phone_number",)
+    search_help_text = "Phone number prefix or session id"
+    raw_id_fields = ("device",)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_search_results(self, request, queryset, search_term):
+        term = search_term.strip()
+        if not term:
+            return queryset, False
+
+        lookup = Q(phone_number__startswith=term)
+        if term.isdigit():
+            lookup |= Q(id=int(term))
+        return queryset.filter(lookup), False
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
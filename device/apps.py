@@ -4,3 +4,14 @@ from django.apps import AppConfig
 class DeviceConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'device'
+
+    def ready(self):
+        from . import geo, session_cache  # noqa: F401 - register the index and detail cache signal handlers
+
+    def warm_up(self):
+        from .geo import device_index
+        from .utils import resume_session_expiries
+
+        device_index.ensure_current()
+        expired, resumed = resume_session_expiries()
+        print(f"⏱️ {len(device_index)} devices indexed, {expired} idle sessions closed, {resumed} timers resumed")
@@ -0,0 +1,99 @@
+from datetime import timedelta
+from itertools import groupby
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import ArchivedSession, Session, SessionItem
+
+SESSION_ARCHIVE_AFTER_DAYS = getattr(settings, "SESSION_ARCHIVE_AFTER_DAYS", 90)
+
+
+def pack_items(items):
+    return [[sku, timestamp.isoformat(), score] for sku, timestamp, score in items]
+
+
+def unpack_items(packed):
+    return [
+        {'sku': sku, 'timestamp': parse_datetime(timestamp), 'score': score}
+        for sku, timestamp, score in packed
+    ]
+
+
+def archive_batch(session_ids):
+    """
+    Move the given closed sessions and their items into ArchivedSession rows.
+
+    An archive row that already exists raises IntegrityError and rolls the whole
+    batch back; the hot rows are only deleted once their copy is really stored.
+    """
+    with transaction.atomic():
+        sessions = list(
+            Session.objects.select_for_update()
+            .filter(id__in=session_ids, status='inactive')
+            .order_by('id')
+        )
+        if not sessions:
+            return 0
+        ids = [session.id for session in sessions]
+
+        items = (
+            SessionItem.objects.filter(session_id__in=ids)
+            .order_by('session_id', 'timestamp', 'id')
+            .values_list('session_id', 'sku', 'timestamp', 'score')
+        )
+        packed = {
+            session_id: pack_items(row[1:] for row in rows)
+            for session_id, rows in groupby(items.iterator(), key=lambda row: row[0])
+        }
+
+        ArchivedSession.objects.bulk_create([
+            ArchivedSession(
+                id=session.id,
+                device_id=session.device_id,
+                phone_number=session.phone_number,
+                status=session.status,
+                start_time=session.start_time,
+                end_time=session.end_time,
+                items=packed.get(session.id, []),
+                item_count=len(packed.get(session.id, [])),
+            )
+            for session in sessions
+        ])
+
+        SessionItem.objects.filter(session_id__in=ids).delete()
+        Session.objects.filter(id__in=ids).delete()
+    return len(ids)
+
+
+def archive_sessions(older_than_days=SESSION_ARCHIVE_AFTER_DAYS, batch_size=500):
+    """Archive every session closed more than `older_than_days` ago, in small transactions."""
+    cutoff = timezone.now() - timedelta(days=older_than_days)
+    candidates = Session.objects.filter(status='inactive', end_time__lt=cutoff).order_by('id')
+
+    archived = 0
+    while True:
+        ids = list(candidates.values_list('id', flat=True)[:batch_size])
+        moved = archive_batch(ids) if ids else 0
+        if not moved:
+            return archived
+        archived += moved
+
+
+def load_archived_session_detail(session_id):
+    try:
+        archived = ArchivedSession.objects.select_related('device').get(id=session_id)
+    except ArchivedSession.DoesNotExist:
+        return None
+
+    return {
+        'session_id': archived.id,
+        'device': archived.device.name,
+        'phone_number': archived.phone_number,
+        'status': archived.status,
+        'start_time': archived.start_time,
+        'end_time': archived.end_time,
+        'items': unpack_items(archived.items),
+    }
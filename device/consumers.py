@@ -1,47 +1,141 @@
+import asyncio
+import weakref
+from urllib.parse import parse_qs
+
+from channels.db import database_sync_to_async
 from channels.generic.websocket import AsyncWebsocketConsumer
-import json
 
-class DeviceConsumer(AsyncWebsocketConsumer):
+from config import warmup
+from .presence import keep_online, mark_offline, mark_online
+from .events import (
+    BINARY_SUBPROTOCOL, SUBPROTOCOLS, build_snapshot_event, msgpack_frame, replay_session_events,
+)
+
+
+# Mirrors 1012 "Service Restart": reconnect, another worker takes over. daphne (autobahn)
+# only lets a server send 1000 or 3000-4999, hence the application range.
+SERVICE_RESTART_CLOSE_CODE = 4012
+
+_open_streams = weakref.WeakSet()
+
+
+@warmup.on_drain
+async def close_streams():
+    """Close every open stream of this worker before it stops."""
+    for consumer in list(_open_streams):
+        await consumer.close(code=SERVICE_RESTART_CLOSE_CODE)
+
+
+class EventStreamConsumer(AsyncWebsocketConsumer):
+    """
+    Forwards events published through `device.events` without re-encoding them.
+
+    The payload is serialized to JSON once at publish time, so every socket in the
+    group just writes the ready-made text frame; msgpack sockets share one
+    conversion per event and process.
+    """
+
+    binary = False
+    # Newest seq sent by the resume replay; live events up to it are duplicates.
+    replay_head = None
+
+    async def accept_stream(self):
+        """Accept the socket; False if the worker is draining and it was closed right away."""
+        offered = self.scope.get("subprotocols") or []
+        subprotocol = next((p for p in offered if p in SUBPROTOCOLS), None)
+        self.binary = subprotocol == BINARY_SUBPROTOCOL
+        await self.accept(subprotocol)
+        if warmup.is_draining():
+            await self.close(code=SERVICE_RESTART_CLOSE_CODE)
+            return False
+        _open_streams.add(self)
+        return True
+
+    async def forward(self, event):
+        seq = event.get("seq")
+        if seq is not None and self.replay_head is not None and seq <= self.replay_head:
+            # Already delivered by the replay. Live events are not compared with each
+            # other: publishers race, and N+1 may arrive after N+2.
+            return
+        await self.send_frame(event)
+
+    async def send_frame(self, event):
+        if self.binary:
+            await self.send(bytes_data=msgpack_frame(event["text"]))
+        else:
+            await self.send(text_data=event["text"])
+
+
+class DeviceConsumer(EventStreamConsumer):
+    online = False
+    presence_task = None
+
     async def connect(self):
         self.serial_number = self.scope['url_route']['kwargs']['serial_number']
         self.group_name = f"device_{self.serial_number}"
 
         await self.channel_layer.group_add(self.group_name, self.channel_name)
-        await self.accept()
+        if not await self.accept_stream():
+            return
+        await mark_online(self.serial_number)
+        self.online = True
+        self.presence_task = asyncio.ensure_future(keep_online(self.serial_number))
         print(f"✅ Device {self.serial_number} connected")
 
     async def disconnect(self, close_code):
         await self.channel_layer.group_discard(self.group_name, self.channel_name)
+        if self.presence_task:
+            self.presence_task.cancel()
+        if self.online:
+            await mark_offline(self.serial_number)
         print(f"❌ Device {self.serial_number} disconnected")
 
     async def session_created(self, event):
-        await self.send(text_data=json.dumps({
-            "event": "session_created",
-            "data": event["message"]
-        }))
+        await self.forward(event)
 
     async def session_stopped(self, event):
-        await self.send(text_data=json.dumps({
-            "event": "session_stopped",
-            "data": event["message"]
-        }))
+        await self.forward(event)
+
+
+# Application close codes live in 4000-4999; this one mirrors HTTP 404.
+SESSION_NOT_FOUND_CLOSE_CODE = 4404
 
 
-class SessionConsumer(AsyncWebsocketConsumer):
+class SessionConsumer(EventStreamConsumer):
     async def connect(self):
         self.session_id = self.scope['url_route']['kwargs']['session_id']
         self.group_name = f"session_{self.session_id}"
 
         await self.channel_layer.group_add(self.group_name, self.channel_name)
-        await self.accept()
+        if not await self.accept_stream():
+            return
         print(f"✅ Session {self.session_id} connected")
 
+        query = parse_qs(self.scope.get("query_string", b"").decode())
+        last_seq = query.get("last_seq", [""])[0]
+        if last_seq.isdigit():
+            await self.resume(int(last_seq))
+
+    async def resume(self, last_seq):
+        events, head = await database_sync_to_async(replay_session_events)(self.session_id, last_seq)
+        if events is None:
+            snapshot = await database_sync_to_async(build_snapshot_event)(self.session_id, head)
+            await self.send_frame(snapshot)
+            if snapshot["type"] == "session.not_found":
+                await self.close(code=SESSION_NOT_FOUND_CLOSE_CODE)
+                return
+            events = []
+
+        for event in events:
+            await self.send_frame(event)
+        self.replay_head = head
+
     async def disconnect(self, close_code):
         await self.channel_layer.group_discard(self.group_name, self.channel_name)
         print(f"❌ Session {self.session_id} disconnected")
 
+    async def session_stopped(self, event):
+        await self.forward(event)
+
     async def item_scanned(self, event):
-        await self.send(text_data=json.dumps({
-            "event": "item_scanned",
-            "data": event["message"]
-        }))
\ No newline at end of file
+        await self.forward(event)
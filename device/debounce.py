@@ -0,0 +1,103 @@
+import threading
+import time
+
+import redis
+from django.conf import settings
+
+# Barcode readers tend to fire the same SKU twice within a few milliseconds.
+# A scan of the same (session, sku) inside this window is dropped before it
+# reaches the database. 0 disables the check.
+SCAN_DEBOUNCE_WINDOW_MS = getattr(settings, "SCAN_DEBOUNCE_WINDOW_MS", 300)
+SCAN_DEBOUNCE_REDIS_URL = getattr(settings, "SCAN_DEBOUNCE_REDIS_URL", None)
+
+
+class LocalScanDebouncer:
+    """In-process window; enough when a single worker serves the kiosks."""
+
+    prune_threshold = 10000
+
+    def __init__(self, window_ms):
+        self.window = window_ms / 1000
+        self.suppressed = 0
+        self._seen = {}
+        self._lock = threading.Lock()
+
+    def is_duplicate(self, session_id, sku):
+        key = (str(session_id), sku)
+        now = time.monotonic()
+
+        with self._lock:
+            if len(self._seen) > self.prune_threshold:
+                self._seen = {k: expires for k, expires in self._seen.items() if expires > now}
+
+            expires = self._seen.get(key)
+            if expires is not None and expires > now:
+                self.suppressed += 1
+                return True
+
+            self._seen[key] = now + self.window
+            return False
+
+    def forget(self, session_id, sku):
+        with self._lock:
+            self._seen.pop((str(session_id), sku), None)
+
+
+class RedisScanDebouncer:
+    """Window shared by every worker, one `SET NX PX` per scan."""
+
+    counter_key = "scan_debounce:suppressed"
+
+    def __init__(self, url, window_ms):
+        self.client = redis.Redis.from_url(url)
+        self.window_ms = window_ms
+
+    def is_duplicate(self, session_id, sku):
+        try:
+            first = self.client.set(f"scan_debounce:{session_id}:{sku}", 1, nx=True, px=self.window_ms)
+            if first:
+                return False
+            self.client.incr(self.counter_key)
+            return True
+        except (redis.ConnectionError, redis.TimeoutError):
+            # Never lose a real scan because Redis is unreachable.
+            return False
+
+    def forget(self, session_id, sku):
+        try:
+            self.client.delete(f"scan_debounce:{session_id}:{sku}")
+        except (redis.ConnectionError, redis.TimeoutError):
+            pass
+
+    @property
+    def suppressed(self):
+        try:
+            return int(self.client.get(self.counter_key) or 0)
+        except (redis.ConnectionError, redis.TimeoutError):
+            return 0
+
+
+_debouncer = None
+
+
+def get_scan_debouncer():
+    global _debouncer
+    if _debouncer is None:
+        if SCAN_DEBOUNCE_REDIS_URL:
+            _debouncer = RedisScanDebouncer(SCAN_DEBOUNCE_REDIS_URL, SCAN_DEBOUNCE_WINDOW_MS)
+        else:
+            _debouncer = LocalScanDebouncer(SCAN_DEBOUNCE_WINDOW_MS)
+    return _debouncer
+
+
+def is_duplicate_scan(session_id, sku):
+    if SCAN_DEBOUNCE_WINDOW_MS <= 0 or not sku:
+        return False
+    return get_scan_debouncer().is_duplicate(session_id, sku)
+
+
+def forget_scan(session_id, sku):
+    """Reopen the window after a scan that was not recorded, so a retry is not reported as a duplicate."""
+    if SCAN_DEBOUNCE_WINDOW_MS <= 0 or not sku:
+        return
+    get_scan_debouncer().forget(session_id, sku)
@@ -0,0 +1,147 @@
+import json
+from decimal import Decimal
+from functools import lru_cache
+
+import msgpack
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.core.cache import cache
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional, stdlib json is the fallback
+    orjson = None
+
+
+# Clients on constrained kiosk hardware can ask for msgpack frames by offering
+# this WebSocket subprotocol; everybody else keeps getting JSON text frames.
+BINARY_SUBPROTOCOL = "yaxshilink.msgpack"
+JSON_SUBPROTOCOL = "yaxshilink.json"
+SUBPROTOCOLS = (BINARY_SUBPROTOCOL, JSON_SUBPROTOCOL)
+
+# Every session stream keeps its last N encoded events so a client that lost its
+# socket can resume with `?last_seq=` instead of reloading the whole session.
+EVENT_LOG_SIZE = getattr(settings, "SESSION_EVENT_LOG_SIZE", 100)
+EVENT_LOG_TTL = getattr(settings, "SESSION_EVENT_LOG_TTL", 60 * 60)
+
+
+def _default(obj):
+    if hasattr(obj, "isoformat"):
+        return obj.isoformat()
+    if isinstance(obj, Decimal):
+        return str(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not serializable")
+
+
+def dumps(payload):
+    if orjson is not None:
+        return orjson.dumps(payload, default=_default).decode()
+    return json.dumps(payload, default=_default)
+
+
+def loads(text):
+    return orjson.loads(text) if orjson is not None else json.loads(text)
+
+
+@lru_cache(maxsize=256)
+def msgpack_frame(text):
+    """
+    The msgpack version of a JSON frame, for sockets that negotiated it.
+
+    Events travel through the channel layer and the replay log as JSON only, so
+    the opt-in binary format costs nothing when nobody uses it. The cache makes
+    the conversion happen once per process for all binary sockets in a group.
+    """
+    return msgpack.packb(loads(text))
+
+
+def build_event(event_type, message, seq=None):
+    """
+    Build a channel layer event whose payload is already encoded.
+
+    `event_type` is the consumer handler type ("session.created"); the frame the
+    client sees carries the underscored name ("session_created") like before.
+    """
+    frame = {"event": event_type.replace(".", "_"), "data": message}
+    event = {"type": event_type}
+    if seq is not None:
+        frame["seq"] = event["seq"] = seq
+    event["text"] = dumps(frame)
+    return event
+
+
+def _group_send(group, event):
+    channel_layer = get_channel_layer()
+    async_to_sync(channel_layer.group_send)(group, event)
+
+
+def publish(group, event_type, message):
+    _group_send(group, build_event(event_type, message))
+
+
+def publish_device_event(serial_number, event_type, message):
+    publish(f"device_{serial_number}", event_type, message)
+
+
+def _seq_key(session_id):
+    return f"session_events:{session_id}:seq"
+
+
+def _event_key(session_id, seq):
+    return f"session_events:{session_id}:{seq}"
+
+
+def next_seq(session_id):
+    key = _seq_key(session_id)
+    cache.add(key, 0, EVENT_LOG_TTL)
+    try:
+        seq = cache.incr(key)
+    except ValueError:
+        # The counter expired between add() and incr(); start a fresh stream.
+        cache.add(key, 0, EVENT_LOG_TTL)
+        seq = cache.incr(key)
+    cache.touch(key, EVENT_LOG_TTL)
+    return seq
+
+
+def publish_session_event(session_id, event_type, message):
+    seq = next_seq(session_id)
+    event = build_event(event_type, message, seq=seq)
+
+    cache.set(_event_key(session_id, seq), event, EVENT_LOG_TTL)
+    if seq > EVENT_LOG_SIZE:
+        cache.delete(_event_key(session_id, seq - EVENT_LOG_SIZE))
+
+    _group_send(f"session_{session_id}", event)
+
+
+def replay_session_events(session_id, last_seq):
+    """
+    Return `(events, head)` with the events published after `last_seq`.
+
+    `events` is None when the gap can no longer be replayed from the log (too
+    many missed events, expired entries or a restarted stream); the caller
+    should send a snapshot instead.
+    """
+    head = cache.get(_seq_key(session_id)) or 0
+    if last_seq == head:
+        return [], head
+    if last_seq > head or head - last_seq > EVENT_LOG_SIZE:
+        return None, head
+
+    keys = [_event_key(session_id, seq) for seq in range(last_seq + 1, head + 1)]
+    found = cache.get_many(keys)
+    if len(found) != len(keys):
+        return None, head
+    return [found[key] for key in keys], head
+
+
+def build_snapshot_event(session_id, seq):
+    """The full session as one event, or a `session_not_found` event if it does not exist."""
+    from .session_cache import get_session_detail
+
+    session = get_session_detail(session_id)
+    if session is None:
+        return build_event("session.not_found", {"session_id": session_id})
+    return build_event("session.snapshot", session, seq=seq)
@@ -0,0 +1,158 @@
+import csv
+from datetime import datetime, time, timedelta
+
+from asgiref.sync import sync_to_async
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from barcode.models import Bottle
+from .archive import unpack_items
+from .events import dumps
+from .models import ArchivedSession, SessionItem
+
+EXPORT_FORMATS = ("csv", "ndjson")
+EXPORT_COLUMNS = (
+    "session_id", "device_serial", "device_name", "phone_number", "session_start", "session_end",
+    "sku", "material", "score", "scanned_at",
+)
+EXPORT_CHUNK_SIZE = 2000
+# Rows encoded into one chunk of the streamed response.
+ROWS_PER_CHUNK = 500
+
+
+def parse_bound(value, end=False):
+    """
+    Parse a `start`/`end` filter: a date ("2025-10-01") or an ISO datetime.
+
+    A bare end date includes the whole day. Raises ValueError on anything else.
+    """
+    if not value:
+        return None
+
+    # Dates first: parse_datetime() also takes a bare date, as midnight.
+    day = parse_date(value)
+    if day is not None:
+        moment = datetime.combine(day + timedelta(days=1) if end else day, time.min)
+    else:
+        moment = parse_datetime(value)
+        if moment is None:
+            raise ValueError(f"Invalid date: {value!r}")
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+def iter_export_rows(start=None, end=None, device=None, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Yield one dict per scanned item, hot sessions first and then archived ones.
+
+    Sessions are filtered on their start time, `start <= start_time < end`, and
+    optionally on the device serial number. Querysets are consumed with
+    `.iterator()`, so PostgreSQL streams them through a server-side cursor.
+    """
+    materials = dict(Bottle.objects.values_list('sku', 'material'))
+
+    items = SessionItem.objects.all()
+    archived = ArchivedSession.objects.select_related('device')
+    if start:
+        items = items.filter(session__start_time__gte=start)
+        archived = archived.filter(start_time__gte=start)
+    if end:
+        items = items.filter(session__start_time__lt=end)
+        archived = archived.filter(start_time__lt=end)
+    if device:
+        items = items.filter(session__device__serial_number=device)
+        archived = archived.filter(device__serial_number=device)
+
+    rows = items.order_by('session_id', 'id').values_list(
+        'session_id', 'session__device__serial_number', 'session__device__name', 'session__phone_number',
+        'session__start_time', 'session__end_time', 'sku', 'score', 'timestamp',
+    )
+    for session_id, serial, name, phone, started, ended, sku, score, scanned in rows.iterator(chunk_size):
+        yield {
+            "session_id": session_id,
+            "device_serial": serial,
+            "device_name": name,
+            "phone_number": phone,
+            "session_start": started,
+            "session_end": ended,
+            "sku": sku,
+            "material": materials.get(sku, ""),
+            "score": score,
+            "scanned_at": scanned,
+        }
+
+    for session in archived.order_by('id').iterator(chunk_size):
+        for item in unpack_items(session.items):
+            yield {
+                "session_id": session.id,
+                "device_serial": session.device.serial_number,
+                "device_name": session.device.name,
+                "phone_number": session.phone_number,
+                "session_start": session.start_time,
+                "session_end": session.end_time,
+                "sku": item['sku'],
+                "material": materials.get(item['sku'], ""),
+                "score": item['score'],
+                "scanned_at": item['timestamp'],
+            }
+
+
+class _Echo:
+    """csv.writer target that hands the formatted line back instead of storing it."""
+
+    def write(self, value):
+        return value
+
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    return value.isoformat() if hasattr(value, "isoformat") else value
+
+
+def _chunked(lines):
+    """Join lines into chunks of ROWS_PER_CHUNK; the first line goes out alone so the first byte is immediate."""
+    chunk = []
+    first = True
+    for line in lines:
+        chunk.append(line)
+        if first or len(chunk) >= ROWS_PER_CHUNK:
+            yield "".join(chunk)
+            chunk = []
+            first = False
+    if chunk:
+        yield "".join(chunk)
+
+
+def stream_csv(rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(EXPORT_COLUMNS)
+    yield from _chunked(
+        writer.writerow([_csv_value(row[column]) for column in EXPORT_COLUMNS]) for row in rows
+    )
+
+
+def stream_ndjson(rows):
+    yield from _chunked(dumps(row) + "\n" for row in rows)
+
+
+def stream_export(export_format, rows):
+    return stream_csv(rows) if export_format == "csv" else stream_ndjson(rows)
+
+
+async def aiter_chunks(chunks):
+    """
+    Hand a sync chunk generator to an ASGI StreamingHttpResponse one chunk at a time.
+
+    Django buffers a sync iterator completely before serving it over ASGI. Pulling
+    each chunk through the thread-sensitive executor keeps memory flat, and the
+    database cursor stays on the one thread that opened it.
+    """
+    get_next = sync_to_async(next, thread_sensitive=True)
+    done = object()
+    while True:
+        chunk = await get_next(chunks, done)
+        if chunk is done:
+            return
+        yield chunk
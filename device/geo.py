@@ -0,0 +1,229 @@
+import heapq
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Device
+
+EARTH_RADIUS_KM = 6371.0088
+
+# Safety net: rebuild from the database at least this often (seconds), even if
+# no change was announced through the cache.
+DEVICE_GEO_MAX_AGE = getattr(settings, "DEVICE_GEO_MAX_AGE", 5 * 60)
+
+VERSION_KEY = "device_geo:version"
+INDEX_FIELDS = ('id', 'name', 'serial_number', 'location', 'latitude', 'longitude')
+
+
+def to_vector(lat, lng):
+    """Point on the unit sphere; the straight-line (chord) distance orders points like the great-circle one."""
+    lat, lng = math.radians(lat), math.radians(lng)
+    return (math.cos(lat) * math.cos(lng), math.cos(lat) * math.sin(lng), math.sin(lat))
+
+
+def chord_to_km(chord):
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, chord / 2))
+
+
+def km_to_chord(km):
+    return 2 * math.sin(min(math.pi, km / EARTH_RADIUS_KM) / 2)
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    a, b = to_vector(lat1, lng1), to_vector(lat2, lng2)
+    return chord_to_km(math.dist(a, b))
+
+
+class KDTree:
+    """Static 3-d tree over (vector, device) pairs: one index array plus a bounding box per node."""
+
+    leaf_size = 8
+
+    def __init__(self, entries):
+        self.vectors = [vector for vector, _ in entries]
+        self.devices = [device for _, device in entries]
+        self.order = list(range(len(entries)))
+        self.boxes = {}
+        if self.order:
+            self._build(1, 0, len(self.order), 0)
+
+    def __len__(self):
+        return len(self.order)
+
+    def _build(self, node, lo, hi, depth):
+        points = [self.vectors[i] for i in self.order[lo:hi]]
+        self.boxes[node] = (tuple(map(min, zip(*points))), tuple(map(max, zip(*points))))
+        if hi - lo <= self.leaf_size:
+            return
+        axis = depth % 3
+        self.order[lo:hi] = sorted(self.order[lo:hi], key=lambda i: self.vectors[i][axis])
+        mid = (lo + hi) // 2
+        self._build(2 * node, lo, mid, depth + 1)
+        self._build(2 * node + 1, mid, hi, depth + 1)
+
+    def _box_distance(self, node, point):
+        low, high = self.boxes[node]
+        d2 = 0.0
+        for p, lo, hi in zip(point, low, high):
+            if p < lo:
+                d2 += (lo - p) ** 2
+            elif p > hi:
+                d2 += (p - hi) ** 2
+        return d2
+
+    def search(self, point, consider, worst):
+        """Feed every entry that may beat `worst()` (a squared chord) to `consider(d2, device)`."""
+        vectors, devices, order = self.vectors, self.devices, self.order
+
+        def visit(node, lo, hi):
+            if hi - lo <= self.leaf_size:
+                for i in order[lo:hi]:
+                    v = vectors[i]
+                    consider((v[0] - point[0]) ** 2 + (v[1] - point[1]) ** 2 + (v[2] - point[2]) ** 2, devices[i])
+                return
+
+            mid = (lo + hi) // 2
+            children = sorted([
+                (self._box_distance(2 * node, point), 2 * node, lo, mid),
+                (self._box_distance(2 * node + 1, point), 2 * node + 1, mid, hi),
+            ])
+            for distance, child, child_lo, child_hi in children:
+                if distance <= worst():
+                    visit(child, child_lo, child_hi)
+
+        if order and self._box_distance(1, point) <= worst():
+            visit(1, 0, len(order))
+
+
+class DeviceGeoIndex:
+    """
+    In-memory nearest-machine index.
+
+    Devices live in a k-d tree over unit-sphere vectors, so nearest-N and radius
+    lookups are O(log n) wherever the query point is. Saves and deletes are kept
+    in a small overlay (new positions plus ids hidden in the tree) that is folded
+    into a fresh tree once it grows.
+
+    Every process keeps its own copy. The process that saved the device applies
+    the change in place and bumps a version counter in the shared cache; the
+    other processes see a newer version and reload from the database.
+    """
+
+    def __init__(self):
+        self.version = None
+        self.loaded_at = 0
+        self._devices = {}
+        self._tree = KDTree([])
+        self._added = {}
+        self._hidden = frozenset()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._devices)
+
+    def _rebuild(self, devices):
+        self._tree = KDTree([(to_vector(d['latitude'], d['longitude']), d) for d in devices.values()])
+        self._devices = devices
+        self._added = {}
+        self._hidden = frozenset()
+
+    def load(self, version=None):
+        if version is None:
+            # Seed the counter (fresh Redis, evicted key) so the next lookup does not reload again.
+            cache.add(VERSION_KEY, 0, None)
+            version = cache.get(VERSION_KEY, 0)
+        devices = Device.objects.filter(latitude__isnull=False, longitude__isnull=False).values(*INDEX_FIELDS)
+        devices = {device['id']: device for device in devices.iterator(chunk_size=2000)}
+        with self._lock:
+            self._rebuild(devices)
+            self.version = version
+            self.loaded_at = time.monotonic()
+
+    def ensure_current(self):
+        version = cache.get(VERSION_KEY)
+        stale = time.monotonic() - self.loaded_at > DEVICE_GEO_MAX_AGE
+        if self.version is None or version != self.version or stale:
+            self.load(version)
+
+    def _apply(self, device_id, device):
+        # Copy-on-write, so lookups running in other threads never see a container change size.
+        devices = dict(self._devices)
+        added = dict(self._added)
+        devices.pop(device_id, None)
+        added.pop(device_id, None)
+        if device is not None and device.get('latitude') is not None and device.get('longitude') is not None:
+            devices[device_id] = device
+            added[device_id] = (to_vector(device['latitude'], device['longitude']), device)
+
+        if len(added) + len(self._hidden) > max(64, len(devices) // 20):
+            self._rebuild(devices)
+        else:
+            self._devices, self._added, self._hidden = devices, added, self._hidden | {device_id}
+
+    def device_changed(self, device_id, device=None):
+        """Apply a saved (`device` dict) or deleted (`device` None) device and announce it."""
+        try:
+            version = cache.incr(VERSION_KEY)
+        except ValueError:
+            # No counter yet: start one, so the new value differs from whatever other processes hold.
+            cache.add(VERSION_KEY, 0, None)
+            version = cache.incr(VERSION_KEY)
+
+        with self._lock:
+            if self.version is not None and version == self.version + 1:
+                self._apply(device_id, device)
+                self.version = version
+            else:
+                # Somebody else changed devices too; reload on the next lookup.
+                self.version = None
+
+    def nearest(self, lat, lng, limit=10, radius_km=None):
+        """Return up to `limit` `(distance_km, device)` pairs, closest first."""
+        tree, added, hidden = self._tree, self._added, self._hidden
+        point = to_vector(lat, lng)
+        bound = km_to_chord(radius_km) ** 2 if radius_km is not None else math.inf
+        heap = []  # (-squared chord, device id, device), the worst match on top
+
+        def worst():
+            return -heap[0][0] if len(heap) >= limit else bound
+
+        def consider(d2, device):
+            if d2 > worst():
+                return
+            item = (-d2, device['id'], device)
+            if len(heap) < limit:
+                heapq.heappush(heap, item)
+            else:
+                heapq.heappushpop(heap, item)
+
+        def consider_tree(d2, device):
+            # Moved or deleted since the tree was built; the overlay has the current position.
+            if device['id'] not in hidden:
+                consider(d2, device)
+
+        for vector, device in added.values():
+            consider(math.dist(point, vector) ** 2, device)
+        tree.search(point, consider_tree, worst)
+
+        return [(chord_to_km(math.sqrt(-d2)), device) for d2, _, device in sorted(heap, reverse=True)]
+
+
+device_index = DeviceGeoIndex()
+
+
+@receiver(post_save, sender=Device)
+def device_saved(sender, instance, **kwargs):
+    device = {field: getattr(instance, field) for field in INDEX_FIELDS}
+    transaction.on_commit(lambda: device_index.device_changed(instance.id, device))
+
+
+@receiver(post_delete, sender=Device)
+def device_deleted(sender, instance, **kwargs):
+    device_id = instance.id
+    transaction.on_commit(lambda: device_index.device_changed(device_id))
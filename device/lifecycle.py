@@ -0,0 +1,98 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from .events import publish_device_event, publish_session_event
+from .models import Session, SessionItem
+from .session_cache import invalidate_session_detail
+
+SESSION_IDLE_TIMEOUT = getattr(settings, "SESSION_IDLE_TIMEOUT", 60)
+
+
+def _close_session(session_id, reason=None, **conditions):
+    """
+    Move an active session to inactive with a single conditional UPDATE.
+
+    Only the caller whose UPDATE actually matched the row wins the transition;
+    it alone loads the device (one joined query) and broadcasts the stop, so a
+    manual stop racing the idle timeout can never announce the session twice.
+    Returns the closed session for the winner, None for everybody else.
+    """
+    closed = Session.objects.filter(id=session_id, status='active', **conditions).update(
+        status='inactive',
+        end_time=timezone.now(),
+    )
+    if not closed:
+        return None
+
+    session = Session.objects.select_related('device').only(
+        'id', 'phone_number', 'status', 'device__name', 'device__serial_number',
+    ).get(id=session_id)
+    invalidate_session_detail(session.id)
+
+    extra = {"reason": reason} if reason else {}
+    publish_device_event(session.device.serial_number, "session.stopped", {
+        "session_id": session.id,
+        "phone_number": session.phone_number,
+        "device": session.device.name,
+        "status": session.status,
+        **extra,
+    })
+    publish_session_event(session.id, "session.stopped", {
+        "session_id": session.id,
+        "status": session.status,
+        **extra,
+    })
+    return session
+
+
+def stop_session(session_id):
+    return _close_session(session_id)
+
+
+def add_session_item(session_id, sku):
+    """
+    Record a scan only while the session is active; returns the item, or None if it is not.
+
+    Bumping last_activity with a conditional UPDATE first locks the session row
+    until the item is committed, so a stop or timeout that races the scan either
+    closes the session before it (no item) or waits and closes it after.
+    """
+    with transaction.atomic():
+        touched = Session.objects.filter(id=session_id, status='active').update(last_activity=timezone.now())
+        if not touched:
+            return None
+        return SessionItem.objects.create(session_id=session_id, sku=sku)
+
+
+def expire_session(session_id, idle_timeout=SESSION_IDLE_TIMEOUT):
+    """Close the session only if it has really been idle for `idle_timeout` seconds."""
+    idle_since = timezone.now() - timedelta(seconds=idle_timeout)
+    return _close_session(session_id, reason="timeout", last_activity__lte=idle_since)
+
+
+def scanned_active_sessions():
+    """Active sessions with at least one scan: the ones that have an idle timer."""
+    return Session.objects.filter(
+        Exists(SessionItem.objects.filter(session=OuterRef('pk'))),
+        status='active',
+    )
+
+
+def expire_idle_sessions(idle_timeout=SESSION_IDLE_TIMEOUT):
+    """
+    Close every scanned session that has been idle for `idle_timeout` seconds.
+
+    The per-scan timer thread dies with the worker that started it; this sweep
+    catches those sessions. Like the timer it leaves sessions without any scan
+    alone, and it is safe to run next to the timers of other workers since each
+    close is the same conditional UPDATE.
+    """
+    idle_since = timezone.now() - timedelta(seconds=idle_timeout)
+    idle_ids = scanned_active_sessions().filter(last_activity__lte=idle_since).values_list('id', flat=True)
+
+    expired = (expire_session(session_id, idle_timeout) for session_id in list(idle_ids))
+    return [session for session in expired if session is not None]
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError
+
+from device.archive import SESSION_ARCHIVE_AFTER_DAYS, archive_sessions
+
+
+class Command(BaseCommand):
+    help = "Move closed sessions and their items out of the hot tables into ArchivedSession."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days", type=int, default=SESSION_ARCHIVE_AFTER_DAYS,
+            help="Archive sessions closed more than this many days ago.",
+        )
+        parser.add_argument("--batch-size", type=int, default=500, help="Sessions moved per transaction.")
+
+    def handle(self, *args, **options):
+        try:
+            archived = archive_sessions(options["days"], options["batch_size"])
+        except IntegrityError as e:
+            raise CommandError(f"An archived session with the same id already exists, nothing was deleted: {e}")
+        self.stdout.write(self.style.SUCCESS(f"Archived {archived} sessions."))
@@ -0,0 +1,86 @@
+import asyncio
+import statistics
+import time
+
+import redis
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.module_loading import import_string
+
+from config.channel_layers import BACKENDS, channel_layer_config, parse_hosts
+from device.events import build_event
+
+
+class Command(BaseCommand):
+    help = "Compare group_send and fan-out latency of the channel layer backends."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--backend", action="append", choices=sorted(BACKENDS),
+            help="Backend to measure, may be repeated (default: memory and the configured one).",
+        )
+        parser.add_argument(
+            "--hosts", default=",".join(settings.CHANNEL_REDIS_HOSTS),
+            help="Comma-separated Redis hosts for the redis/pubsub backends.",
+        )
+        parser.add_argument("--receivers", type=int, default=20, help="Sockets subscribed to the group.")
+        parser.add_argument("--messages", type=int, default=200, help="Events sent per backend.")
+
+    def handle(self, *args, **options):
+        backends = options["backend"] or sorted({"memory", settings.CHANNEL_LAYER_BACKEND})
+        hosts = parse_hosts(options["hosts"])
+
+        self.stdout.write(
+            f"{options['receivers']} receivers, {options['messages']} messages, hosts: {', '.join(hosts)}"
+        )
+        self.stdout.write(f"{'backend':<8} {'send p50':>10} {'send p99':>10} {'fan-out p50':>12} {'fan-out p99':>12}")
+
+        for backend in backends:
+            config = channel_layer_config(backend, hosts)
+            layer = import_string(config["BACKEND"])(**config.get("CONFIG", {}))
+            try:
+                send, fanout = asyncio.run(self.measure(layer, options["receivers"], options["messages"]))
+            except (OSError, redis.ConnectionError) as exc:
+                raise CommandError(f"{backend}: cannot reach the channel layer ({exc})")
+
+            self.stdout.write(
+                f"{backend:<8} {_ms(send, 50):>10} {_ms(send, 99):>10} {_ms(fanout, 50):>12} {_ms(fanout, 99):>12}"
+            )
+
+    async def measure(self, layer, receivers, messages):
+        group = "bench_channel_layer"
+        channels = [await layer.new_channel() for _ in range(receivers)]
+        for channel in channels:
+            await layer.group_add(group, channel)
+
+        # A realistic payload: an item_scanned event with a handful of items.
+        event = build_event("item.scanned", {
+            "session_id": 1,
+            "items": [{"id": i, "sku": "4780012345678", "score": 0, "session": 1} for i in range(10)],
+            "total_items": 10,
+        })
+
+        send, fanout = [], []
+        try:
+            for _ in range(messages):
+                started = time.perf_counter()
+                await layer.group_send(group, event)
+                sent = time.perf_counter()
+                await asyncio.gather(*(layer.receive(channel) for channel in channels))
+                received = time.perf_counter()
+
+                send.append(sent - started)
+                fanout.append(received - started)
+        finally:
+            for channel in channels:
+                await layer.group_discard(group, channel)
+            if hasattr(layer, "flush"):
+                await layer.flush()
+        return send, fanout
+
+
+def _ms(samples, percentile):
+    if len(samples) < 2:
+        return f"{samples[0] * 1000:.3f}ms" if samples else "-"
+    value = statistics.quantiles(samples, n=100)[percentile - 1]
+    return f"{value * 1000:.3f}ms"
@@ -0,0 +1,32 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from device.exports import EXPORT_FORMATS, iter_export_rows, parse_bound, stream_export
+
+
+class Command(BaseCommand):
+    help = "Stream scanned items with their session, device and bottle material as CSV or NDJSON."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--format", dest="export_format", choices=EXPORT_FORMATS, default="csv")
+        parser.add_argument("--start", help="Sessions started on or after this date/datetime.")
+        parser.add_argument("--end", help="Sessions started on or before this date (or before this datetime).")
+        parser.add_argument("--device", help="Only sessions of the device with this serial number.")
+        parser.add_argument("--output", help="File to write to (default: stdout).")
+
+    def handle(self, *args, **options):
+        try:
+            start = parse_bound(options["start"])
+            end = parse_bound(options["end"], end=True)
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        rows = iter_export_rows(start, end, options["device"])
+        out = open(options["output"], "w", newline="", encoding="utf-8") if options["output"] else sys.stdout
+        try:
+            for chunk in stream_export(options["export_format"], rows):
+                out.write(chunk)
+        finally:
+            if out is not sys.stdout:
+                out.close()
@@ -0,0 +1,293 @@
+import http.client
+import os
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from config.warmup import DRAIN_SIGNAL
+from device.lifecycle import SESSION_IDLE_TIMEOUT, expire_idle_sessions
+
+# A worker that dies sooner than this after starting counts as crashing.
+MIN_WORKER_UPTIME = 5
+MAX_RESPAWN_DELAY = 30
+
+DEFAULT_EXPIRE_INTERVAL = max(5, SESSION_IDLE_TIMEOUT // 2)
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path, timeout):
+        super().__init__("localhost", timeout=timeout)
+        self.path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.path)
+
+
+class Command(BaseCommand):
+    help = (
+        "Run several daphne workers on one pre-bound socket, restart them when they die "
+        "and reload them one by one on SIGHUP."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers", type=int, default=int(os.environ.get("WEB_CONCURRENCY", 1)),
+            help="Number of worker processes (default: $WEB_CONCURRENCY or 1).",
+        )
+        parser.add_argument("--bind", default="0.0.0.0", help="Address to listen on.")
+        parser.add_argument("--port", type=int, default=8000, help="Port to listen on.")
+        parser.add_argument("--backlog", type=int, default=2048, help="Listen queue size of the shared socket.")
+        parser.add_argument(
+            "--graceful-timeout", type=int, default=30,
+            help="Seconds a stopping worker gets to finish before it is killed.",
+        )
+        parser.add_argument(
+            "--drain-timeout", type=float, default=3,
+            help="Seconds between asking a worker to close its WebSockets (code 4012) and stopping it.",
+        )
+        parser.add_argument(
+            "--ready-timeout", type=int, default=120,
+            help="Seconds a replacement worker gets to pass /healthz/ready before a reload is abandoned.",
+        )
+        parser.add_argument(
+            "--expire-interval", type=int, default=None,
+            help=(
+                "Seconds between sweeps closing idle sessions whose timer was lost with a worker "
+                f"(0 disables; default {DEFAULT_EXPIRE_INTERVAL} with a shared cache and channel layer, else 0)."
+            ),
+        )
+        parser.add_argument("--proxy-headers", action="store_true", help="Trust X-Forwarded-For from the proxy.")
+
+    def handle(self, *args, **options):
+        self.options = options
+        workers = options["workers"]
+        if workers < 1:
+            raise CommandError("--workers must be at least 1.")
+        if workers > 1:
+            self.check_shared_state()
+        self.configure_sweep()
+
+        self.sock = socket.socket(socket.AF_INET6 if ":" in options["bind"] else socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        try:
+            self.sock.bind((options["bind"], options["port"]))
+        except OSError as e:
+            raise CommandError(f"Cannot bind {options['bind']}:{options['port']}: {e}")
+        self.sock.listen(options["backlog"])
+        self.sock.set_inheritable(True)
+
+        # Every worker also listens on its own unix socket, so its readiness can be probed directly.
+        self.control_dir = tempfile.mkdtemp(prefix="serve-")
+        self.spawned = 0
+        self.workers = {}  # pid -> (process, started_at, control socket)
+        self.respawn_delay = 0
+        self.stopping = False
+        self.reload_requested = False
+        signal.signal(signal.SIGTERM, self.request_stop)
+        signal.signal(signal.SIGINT, self.request_stop)
+        signal.signal(signal.SIGHUP, self.request_reload)
+
+        self.stdout.write(f"🚀 Serving on {options['bind']}:{options['port']} with {workers} workers (pid {os.getpid()})")
+        for _ in range(workers):
+            self.spawn()
+
+        try:
+            self.supervise(workers)
+        finally:
+            self.shutdown()
+            self.sock.close()
+            shutil.rmtree(self.control_dir, ignore_errors=True)
+
+    def unshared_state(self):
+        """What is kept in process memory, so neither the other workers nor this supervisor see it."""
+        missing = []
+        if settings.CHANNEL_LAYERS["default"]["BACKEND"] == "channels.layers.InMemoryChannelLayer":
+            missing.append("a Redis channel layer; set CHANNEL_LAYER_BACKEND=redis or pubsub")
+        if "locmem" in settings.CACHES["default"]["BACKEND"].lower():
+            missing.append("a shared cache; set CACHE_REDIS_URL")
+        return missing
+
+    def check_shared_state(self):
+        # Every worker is its own process: anything kept in process memory is not shared.
+        missing = self.unshared_state()
+        if missing:
+            raise CommandError(f"Several workers need {missing[0]}.")
+        if not getattr(settings, "SCAN_DEBOUNCE_REDIS_URL", None):
+            self.stderr.write("⚠️ SCAN_DEBOUNCE_REDIS_URL is not set; duplicate scans are only caught per worker.")
+
+    def configure_sweep(self):
+        """
+        The sweep closes sessions from this process: the event seq, the cache
+        invalidation and the broadcast only reach the workers through shared
+        state. Without it the workers' own timers, restarted on boot, are all there is.
+        """
+        interval = self.options["expire_interval"]
+        missing = self.unshared_state()
+        if interval is None:
+            interval = 0 if missing else DEFAULT_EXPIRE_INTERVAL
+            if missing:
+                self.stdout.write(f"ℹ️ Idle session sweep disabled, it needs {missing[0]}")
+        elif interval < 0:
+            raise CommandError("--expire-interval cannot be negative.")
+        elif interval and missing:
+            raise CommandError(f"--expire-interval needs {missing[0]}.")
+        self.options["expire_interval"] = interval
+
+    def worker_command(self, control_socket):
+        options = self.options
+        command = [
+            sys.executable, "-m", "daphne",
+            "--fd", str(self.sock.fileno()),
+            "-u", control_socket,
+            "--application-close-timeout", str(options["graceful_timeout"]),
+        ]
+        if options["proxy_headers"]:
+            command.append("--proxy-headers")
+        return command + ["config.asgi:application"]
+
+    def spawn(self):
+        self.spawned += 1
+        control_socket = os.path.join(self.control_dir, f"worker-{self.spawned}.sock")
+        process = subprocess.Popen(self.worker_command(control_socket), pass_fds=(self.sock.fileno(),))
+        self.workers[process.pid] = (process, time.monotonic(), control_socket)
+        self.stdout.write(f"👷 Worker {process.pid} started")
+        return process
+
+    def is_ready(self, control_socket):
+        connection = UnixHTTPConnection(control_socket, timeout=5)
+        try:
+            connection.request("GET", "/healthz/ready")
+            return connection.getresponse().status == 200
+        except OSError:
+            return False
+        finally:
+            connection.close()
+
+    def wait_ready(self, process):
+        """Poll the worker's own /healthz/ready until it passes; False if it died or timed out."""
+        control_socket = self.workers[process.pid][2]
+        deadline = time.monotonic() + self.options["ready_timeout"]
+        while time.monotonic() < deadline and not self.stopping:
+            if process.poll() is not None:
+                return False
+            if self.is_ready(control_socket):
+                return True
+            time.sleep(0.5)
+        return False
+
+    def request_stop(self, signum, frame):
+        self.stopping = True
+
+    def request_reload(self, signum, frame):
+        self.reload_requested = True
+
+    def supervise(self, count):
+        next_sweep = time.monotonic() + self.options["expire_interval"]
+        while not self.stopping:
+            self.reap(count)
+
+            if self.reload_requested:
+                self.reload_requested = False
+                self.reload()
+
+            if self.options["expire_interval"] and time.monotonic() >= next_sweep:
+                self.expire_sessions()
+                next_sweep = time.monotonic() + self.options["expire_interval"]
+
+            time.sleep(0.5)
+
+    def reap(self, count):
+        for pid, (process, started_at, _) in list(self.workers.items()):
+            code = process.poll()
+            if code is None:
+                continue
+            del self.workers[pid]
+            uptime = time.monotonic() - started_at
+            self.stderr.write(f"❌ Worker {pid} exited with code {code} after {uptime:.0f}s")
+            if uptime < MIN_WORKER_UPTIME:
+                self.respawn_delay = min(MAX_RESPAWN_DELAY, self.respawn_delay * 2 or 1)
+            else:
+                self.respawn_delay = 0
+
+        if len(self.workers) < count and not self.stopping:
+            if self.respawn_delay:
+                time.sleep(self.respawn_delay)
+            while len(self.workers) < count:
+                self.spawn()
+
+    def reload(self):
+        """
+        Replace the workers one at a time, so there is always a full set accepting.
+
+        The old worker stops only once its replacement passes /healthz/ready; a
+        replacement that never gets there is stopped and the reload abandoned.
+        The old worker's WebSockets are closed with 4012 (service restart) first;
+        clients reconnect to the other workers and resume with `last_seq`.
+        """
+        self.stdout.write("🔄 Reloading workers")
+        for pid in list(self.workers):
+            if self.stopping:
+                return
+            if pid not in self.workers:
+                continue  # died meanwhile; reap() replaces it
+            replacement = self.spawn()
+            if not self.wait_ready(replacement):
+                self.stderr.write(f"❌ Worker {replacement.pid} did not become ready, keeping the old workers")
+                self.workers.pop(replacement.pid, None)
+                self.stop_workers([replacement])
+                return
+            self.stop_workers([self.workers.pop(pid)[0]])
+
+    def drain_workers(self, processes):
+        """Have the workers close their WebSockets cleanly and give the close frames time to go out."""
+        draining = [process for process in processes if process.poll() is None]
+        if not draining or self.options["drain_timeout"] <= 0:
+            return
+        for process in draining:
+            process.send_signal(DRAIN_SIGNAL)
+
+        deadline = time.monotonic() + self.options["drain_timeout"]
+        while time.monotonic() < deadline and any(process.poll() is None for process in draining):
+            time.sleep(0.1)
+
+    def stop_workers(self, processes):
+        self.drain_workers(processes)
+        for process in processes:
+            if process.poll() is None:
+                process.terminate()
+
+        deadline = time.monotonic() + self.options["graceful_timeout"]
+        for process in processes:
+            try:
+                process.wait(max(0, deadline - time.monotonic()))
+            except subprocess.TimeoutExpired:
+                self.stderr.write(f"⚠️ Worker {process.pid} did not stop in time, killing it")
+                process.kill()
+                process.wait()
+            self.stdout.write(f"🛑 Worker {process.pid} stopped")
+
+    def shutdown(self):
+        self.stdout.write("🛑 Stopping workers")
+        self.stop_workers([process for process, _, _ in self.workers.values()])
+        self.workers.clear()
+
+    def expire_sessions(self):
+        try:
+            expired = expire_idle_sessions()
+        except Exception as e:
+            self.stderr.write(f"❌ Idle session sweep failed: {e}")
+        else:
+            if expired:
+                self.stdout.write(f"⏱️ Closed {len(expired)} idle sessions")
+        finally:
+            close_old_connections()
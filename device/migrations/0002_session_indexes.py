@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('device', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='session',
+            index=models.Index(fields=['start_time'], name='device_session_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='session',
+            index=models.Index(fields=['phone_number'], name='device_session_phone_idx', opclasses=['varchar_pattern_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='sessionitem',
+            index=models.Index(fields=['timestamp'], name='device_item_timestamp_idx'),
+        ),
+    ]
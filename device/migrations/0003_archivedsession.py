@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:33
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('device', '0002_session_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedSession',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('phone_number', models.CharField(max_length=100)),
+                ('status', models.CharField(max_length=20)),
+                ('start_time', models.DateTimeField()),
+                ('end_time', models.DateTimeField(blank=True, null=True)),
+                ('items', models.JSONField(default=list)),
+                ('item_count', models.PositiveIntegerField(default=0)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('device', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='device.device')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['start_time'], name='device_archive_start_idx'), models.Index(fields=['phone_number'], name='device_archive_phone_idx', opclasses=['varchar_pattern_ops'])],
+            },
+        ),
+    ]
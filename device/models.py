@@ -1,4 +1,5 @@
 from django.utils import timezone
+from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
 from django.db.models.signals import post_save
 from django.dispatch import receiver
@@ -16,6 +17,8 @@ class Device(models.Model):
     name = models.CharField(max_length=100)
     serial_number = models.CharField(max_length=100, unique=True, default=generate_unique_serial_number)
     location = models.CharField(max_length=100)
+    latitude = models.FloatField(null=True, blank=True, validators=[MinValueValidator(-90), MaxValueValidator(90)])
+    longitude = models.FloatField(null=True, blank=True, validators=[MinValueValidator(-180), MaxValueValidator(180)])
     token = models.CharField(max_length=64, unique=True, default=generate_device_token)
     created_at = models.DateTimeField(auto_now_add=True)
 
@@ -35,9 +38,16 @@ class Session(models.Model):
         self.last_activity = timezone.now()
         self.save(update_fields=['last_activity'])
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['start_time'], name='device_session_start_idx'),
+            # varchar_pattern_ops lets PostgreSQL answer `LIKE '998%'` prefix searches from the index.
+            models.Index(fields=['phone_number'], name='device_session_phone_idx', opclasses=['varchar_pattern_ops']),
+        ]
+
     def __str__(self):
-        return f"Session for {self.device.name} by {self.phone_number} starting at {self.start_time}"
-    
+        return f"Session #{self.id} by {self.phone_number} starting at {self.start_time}"
+
 
 
 class SessionItem(models.Model):
@@ -46,5 +56,33 @@ class SessionItem(models.Model):
     timestamp = models.DateTimeField(auto_now_add=True)
     score = models.IntegerField(default=0)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['timestamp'], name='device_item_timestamp_idx'),
+        ]
+
+    def __str__(self):
+        return f"Item for session {self.session_id} at {self.timestamp}"
+
+
+class ArchivedSession(models.Model):
+    """A closed session moved out of the hot tables, its items packed into one row."""
+    id = models.BigIntegerField(primary_key=True)
+    device = models.ForeignKey(Device, on_delete=models.CASCADE)
+    phone_number = models.CharField(max_length=100)
+    status = models.CharField(max_length=20)
+    start_time = models.DateTimeField()
+    end_time = models.DateTimeField(null=True, blank=True)
+    # [[sku, timestamp, score], ...] in scan order.
+    items = models.JSONField(default=list)
+    item_count = models.PositiveIntegerField(default=0)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['start_time'], name='device_archive_start_idx'),
+            models.Index(fields=['phone_number'], name='device_archive_phone_idx', opclasses=['varchar_pattern_ops']),
+        ]
+
     def __str__(self):
-        return f"Item for session {self.session.id} at {self.timestamp}"
\ No newline at end of file
+        return f"Archived session #{self.id} by {self.phone_number} starting at {self.start_time}"
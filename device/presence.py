@@ -0,0 +1,57 @@
+import asyncio
+
+from django.conf import settings
+from django.core.cache import cache
+
+# A device counts as online while at least one of its WebSockets is connected.
+# Open sockets refresh the entry several times per TTL, so it only expires when
+# the worker holding them died without disconnecting.
+DEVICE_ONLINE_TTL = getattr(settings, "DEVICE_ONLINE_TTL", 5 * 60)
+DEVICE_ONLINE_HEARTBEAT = DEVICE_ONLINE_TTL / 3
+
+
+def _key(serial_number):
+    return f"device_online:{serial_number}"
+
+
+async def mark_online(serial_number):
+    # A counter, not a flag: a kiosk often reconnects before the disconnect of its
+    # old socket arrives, and that late disconnect must not mark it offline.
+    key = _key(serial_number)
+    await cache.aadd(key, 0, DEVICE_ONLINE_TTL)
+    try:
+        count = await cache.aincr(key)
+    except ValueError:
+        # Evicted between the two calls.
+        count = None
+    if count is None or count < 1:
+        # Also repairs a count pushed below zero by disconnects after an expiry.
+        await cache.aset(key, 1, DEVICE_ONLINE_TTL)
+    else:
+        await cache.atouch(key, DEVICE_ONLINE_TTL)
+
+
+async def keep_online(serial_number):
+    """Refresh the entry while the socket is open; run as a task and cancel it on disconnect."""
+    key = _key(serial_number)
+    while True:
+        await asyncio.sleep(DEVICE_ONLINE_HEARTBEAT)
+        try:
+            if not await cache.atouch(key, DEVICE_ONLINE_TTL):
+                # Expired or evicted meanwhile; this socket is still here.
+                await cache.aadd(key, 1, DEVICE_ONLINE_TTL)
+        except Exception as e:
+            print(f"❌ Presence refresh of {serial_number} failed: {e}")
+
+
+async def mark_offline(serial_number):
+    try:
+        await cache.adecr(_key(serial_number))
+    except ValueError:
+        pass
+
+
+def online_serials(serial_numbers):
+    """Return the subset of `serial_numbers` with a connected device, in one cache read."""
+    found = cache.get_many([_key(serial) for serial in serial_numbers])
+    return {serial for serial in serial_numbers if found.get(_key(serial), 0) > 0}
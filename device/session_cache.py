@@ -0,0 +1,119 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .archive import load_archived_session_detail
+from .events import dumps
+from .models import Session, SessionItem
+
+# Closed sessions never change again, so their payload is cached forever.
+# Active sessions keep a short-lived snapshot that every scan invalidates.
+ACTIVE_SESSION_TTL = getattr(settings, "SESSION_DETAIL_ACTIVE_TTL", 60)
+
+# Generations only have to outlive the writes they guard against, not the entries.
+GENERATION_TTL = 24 * 60 * 60
+
+
+def _key(session_id):
+    return f"session_detail:{session_id}"
+
+
+def _gen_key(session_id):
+    return f"session_detail_gen:{session_id}"
+
+
+def _entry(payload, gen):
+    etag = hashlib.sha1(dumps(payload).encode()).hexdigest()
+    return {"session": payload, "etag": f'"{etag}"', "gen": gen}
+
+
+def _store(session_id, entry):
+    closed = entry["session"]["status"] == "inactive"
+    cache.set(_key(session_id), entry, None if closed else ACTIVE_SESSION_TTL)
+
+
+def load_session_detail(session_id):
+    try:
+        session = Session.objects.select_related('device').get(id=session_id)
+    except Session.DoesNotExist:
+        return load_archived_session_detail(session_id)
+
+    # Same order as archive.pack_items, so an archived session keeps its ETag.
+    items = session.items.order_by('timestamp', 'id').values('sku', 'timestamp', 'score')
+    return {
+        'session_id': session.id,
+        'device': session.device.name,
+        'phone_number': session.phone_number,
+        'status': session.status,
+        'start_time': session.start_time,
+        'end_time': session.end_time,
+        'items': list(items),
+    }
+
+
+def get_session_detail_entry(session_id):
+    """
+    Return `{"session": payload, "etag": ...}`, or None if the session does not exist.
+
+    Every invalidation bumps the session's generation. An entry is only used
+    while its generation is current, so a request that loaded the session just
+    before a scan or a stop cannot put the old payload back in the cache.
+    """
+    found = cache.get_many([_key(session_id), _gen_key(session_id)])
+    entry, gen = found.get(_key(session_id)), found.get(_gen_key(session_id))
+    if gen is None:
+        cache.add(_gen_key(session_id), 0, GENERATION_TTL)
+        gen = cache.get(_gen_key(session_id), 0)
+    if entry is None or entry.get("gen") != gen:
+        # The generation is read before the database, so it is older than any write this load missed.
+        payload = load_session_detail(session_id)
+        if payload is None:
+            return None
+        entry = _entry(payload, gen)
+        _store(session_id, entry)
+    return entry
+
+
+def get_session_detail(session_id):
+    entry = get_session_detail_entry(session_id)
+    return entry["session"] if entry else None
+
+
+def invalidate_session_detail(session_id):
+    key = _gen_key(session_id)
+    cache.add(key, 0, GENERATION_TTL)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Expired between add() and incr().
+        cache.add(key, 1, GENERATION_TTL)
+    cache.touch(key, GENERATION_TTL)
+    cache.delete(_key(session_id))
+
+
+@receiver(post_save, sender=Session)
+def session_saved(sender, instance, update_fields=None, **kwargs):
+    # Scans only bump last_activity, which is not part of the payload.
+    if update_fields and set(update_fields) <= {'last_activity'}:
+        return
+    session_id = instance.id
+    transaction.on_commit(lambda: invalidate_session_detail(session_id))
+
+
+# Items are only deleted together with their session (cascade, archiving), which is
+# covered below. A post_delete receiver on SessionItem would stop Django from
+# fast-deleting them and load every archived item into memory first.
+@receiver(post_delete, sender=Session)
+def session_deleted(sender, instance, **kwargs):
+    session_id = instance.id
+    transaction.on_commit(lambda: invalidate_session_detail(session_id))
+
+
+@receiver(post_save, sender=SessionItem)
+def session_item_saved(sender, instance, **kwargs):
+    session_id = instance.session_id
+    transaction.on_commit(lambda: invalidate_session_detail(session_id))
@@ -0,0 +1,30 @@
+import threading
+from datetime import timedelta
+
+from django.utils import timezone
+
+from device.models import Session
+
+TEST_SETTINGS = {
+    "CHANNEL_LAYERS": {"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}},
+    "CACHES": {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "device-tests"}},
+}
+
+
+class SentEvents:
+    """Records what would have gone through the channel layer."""
+
+    def __init__(self):
+        self.sent = []
+        self.lock = threading.Lock()
+
+    def __call__(self, group, event):
+        with self.lock:
+            self.sent.append((group, event["type"]))
+
+    def count(self, group, event_type):
+        return self.sent.count((group, event_type))
+
+
+def idle(session, seconds=600):
+    Session.objects.filter(id=session.id).update(last_activity=timezone.now() - timedelta(seconds=seconds))
@@ -0,0 +1,91 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from device import archive
+from device.archive import archive_batch, archive_sessions
+from device.models import ArchivedSession, Device, Session, SessionItem
+
+from .helpers import TEST_SETTINGS
+
+
+@override_settings(**TEST_SETTINGS)
+class ArchiveTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.device = Device.objects.create(name="Kiosk", serial_number="kiosk-1")
+        self.now = timezone.now()
+
+    def closed_session(self, days_ago=120, skus=()):
+        session = Session.objects.create(device=self.device, phone_number="998901234567")
+        for sku in skus:
+            SessionItem.objects.create(session=session, sku=sku)
+        Session.objects.filter(id=session.id).update(status="inactive", end_time=self.now - timedelta(days=days_ago))
+        return session
+
+    def test_items_are_packed_in_scan_order(self):
+        session = self.closed_session(skus=["a", "b", "c"])
+        # Inserted a, b, c but scanned b, c, a.
+        for sku, minutes in (("a", 3), ("b", 1), ("c", 2)):
+            SessionItem.objects.filter(session=session, sku=sku).update(timestamp=self.now + timedelta(minutes=minutes))
+
+        self.assertEqual(archive_batch([session.id]), 1)
+
+        archived = ArchivedSession.objects.get(id=session.id)
+        self.assertEqual([item[0] for item in archived.items], ["b", "c", "a"])
+        self.assertEqual(archived.item_count, 3)
+        self.assertFalse(Session.objects.filter(id=session.id).exists())
+        self.assertFalse(SessionItem.objects.filter(session_id=session.id).exists())
+
+    def test_archived_session_is_served_with_the_same_etag(self):
+        session = self.closed_session(skus=["4780000000012", "4780000000029"])
+        url = f"/api/session/{session.id}/"
+        before = self.client.get(url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            archive_batch([session.id])
+        after = self.client.get(url)
+
+        self.assertEqual(after.status_code, 200)
+        self.assertEqual(after["ETag"], before["ETag"])
+        self.assertEqual(after.json(), before.json())
+
+    def test_existing_archive_row_rolls_back_the_batch(self):
+        first, second = self.closed_session(skus=["a"]), self.closed_session(skus=["b"])
+        ArchivedSession.objects.create(
+            id=second.id, device=self.device, phone_number="998901234567", status="inactive", start_time=self.now,
+        )
+
+        with self.assertRaises(IntegrityError):
+            archive_batch([first.id, second.id])
+
+        self.assertEqual(Session.objects.filter(id__in=[first.id, second.id]).count(), 2)
+        self.assertEqual(SessionItem.objects.filter(session_id__in=[first.id, second.id]).count(), 2)
+        self.assertEqual(list(ArchivedSession.objects.values_list('id', flat=True)), [second.id])
+
+    def test_command_reports_a_conflict(self):
+        session = self.closed_session()
+        ArchivedSession.objects.create(
+            id=session.id, device=self.device, phone_number="998901234567", status="inactive", start_time=self.now,
+        )
+        with self.assertRaisesMessage(CommandError, "nothing was deleted"):
+            call_command("archive_sessions")
+        self.assertTrue(Session.objects.filter(id=session.id).exists())
+
+    def test_old_closed_sessions_are_archived_in_batches(self):
+        old = [self.closed_session() for _ in range(5)]
+        recent = self.closed_session(days_ago=10)
+        active = Session.objects.create(device=self.device, phone_number="998901234567")
+        Session.objects.filter(id=active.id).update(start_time=self.now - timedelta(days=200))
+
+        with mock.patch("device.archive.archive_batch", wraps=archive.archive_batch) as batch:
+            self.assertEqual(archive_sessions(90, batch_size=2), 5)
+
+        self.assertEqual([len(call.args[0]) for call in batch.call_args_list], [2, 2, 1])
+        self.assertEqual(set(ArchivedSession.objects.values_list('id', flat=True)), {session.id for session in old})
+        self.assertEqual(set(Session.objects.values_list('id', flat=True)), {recent.id, active.id})
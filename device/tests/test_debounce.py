@@ -0,0 +1,78 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from device.debounce import LocalScanDebouncer
+from device.models import Device, Session
+
+from .helpers import TEST_SETTINGS
+
+
+class LocalScanDebouncerTests(TestCase):
+    def setUp(self):
+        self.debouncer = LocalScanDebouncer(300)
+        self.now = 1000.0
+        patcher = mock.patch("device.debounce.time.monotonic", lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_repeat_inside_window_is_duplicate(self):
+        self.assertFalse(self.debouncer.is_duplicate(1, "4780000000012"))
+        self.now += 0.299
+        self.assertTrue(self.debouncer.is_duplicate(1, "4780000000012"))
+        self.assertEqual(self.debouncer.suppressed, 1)
+
+    def test_repeat_after_window_is_recorded(self):
+        self.debouncer.is_duplicate(1, "4780000000012")
+        self.now += 0.301
+        self.assertFalse(self.debouncer.is_duplicate(1, "4780000000012"))
+
+    def test_other_sku_or_session_is_not_duplicate(self):
+        self.debouncer.is_duplicate(1, "4780000000012")
+        self.assertFalse(self.debouncer.is_duplicate(1, "4780000000029"))
+        self.assertFalse(self.debouncer.is_duplicate(2, "4780000000012"))
+
+    def test_forget_reopens_window(self):
+        self.debouncer.is_duplicate(1, "4780000000012")
+        self.debouncer.forget(1, "4780000000012")
+        self.assertFalse(self.debouncer.is_duplicate(1, "4780000000012"))
+
+
+@override_settings(**TEST_SETTINGS)
+class ScanDebounceViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        debouncer = LocalScanDebouncer(300)
+        patcher = mock.patch("device.debounce.get_scan_debouncer", return_value=debouncer)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        for target in ("device.events._group_send", "device.views.schedule_session_auto_close"):
+            patcher = mock.patch(target)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def scan(self, session_id, sku="4780000000012"):
+        return self.client.post(f"/api/session/{session_id}/items/", {"sku": sku}, content_type="application/json")
+
+    def test_failed_scan_is_not_reported_as_duplicate(self):
+        self.assertEqual(self.scan(999999).status_code, 404)
+        self.assertEqual(self.scan(999999).status_code, 404)
+
+    def test_scan_of_closed_session_is_not_reported_as_duplicate(self):
+        device = Device.objects.create(name="Kiosk", serial_number="kiosk-1")
+        session = Session.objects.create(device=device, phone_number="998901234567", status="inactive")
+        self.assertEqual(self.scan(session.id).status_code, 409)
+        self.assertEqual(self.scan(session.id).status_code, 409)
+
+    def test_double_scan_is_recorded_once(self):
+        device = Device.objects.create(name="Kiosk", serial_number="kiosk-1")
+        session = Session.objects.create(device=device, phone_number="998901234567")
+
+        first = self.scan(session.id)
+        with self.assertLogs("device.views", "DEBUG") as logs:
+            second = self.scan(session.id)
+        self.assertIn("Duplicate scan", logs.output[0])
+        self.assertNotIn("duplicate", first.json())
+        self.assertTrue(second.json()["duplicate"])
+        self.assertEqual(session.items.count(), 1)
@@ -0,0 +1,126 @@
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from channels.testing import WebsocketCommunicator
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+
+from device import events
+from device.consumers import SESSION_NOT_FOUND_CLOSE_CODE, SessionConsumer
+from device.events import build_event, loads, publish_session_event, replay_session_events
+from device.models import Device, Session
+
+from .helpers import TEST_SETTINGS
+
+
+@override_settings(**TEST_SETTINGS)
+class SessionReplayTests(TestCase):
+    session_id = 41
+
+    def setUp(self):
+        cache.clear()
+        patcher = mock.patch("device.events._group_send")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def publish(self, count):
+        for number in range(count):
+            publish_session_event(self.session_id, "item.scanned", {"n": number})
+
+    def test_replays_only_missed_events(self):
+        self.publish(5)
+        replayed, head = replay_session_events(self.session_id, 2)
+        self.assertEqual(head, 5)
+        self.assertEqual([event["seq"] for event in replayed], [3, 4, 5])
+
+    def test_nothing_missed(self):
+        self.publish(3)
+        self.assertEqual(replay_session_events(self.session_id, 3), ([], 3))
+
+    def test_gap_larger_than_log_needs_snapshot(self):
+        with mock.patch.object(events, "EVENT_LOG_SIZE", 3):
+            self.publish(6)
+            self.assertEqual(replay_session_events(self.session_id, 1), (None, 6))
+            self.assertEqual(len(replay_session_events(self.session_id, 3)[0]), 3)
+
+    def test_seq_from_a_restarted_stream_needs_snapshot(self):
+        self.publish(2)
+        self.assertEqual(replay_session_events(self.session_id, 9), (None, 2))
+
+    def test_evicted_event_needs_snapshot(self):
+        self.publish(4)
+        cache.delete(events._event_key(self.session_id, 3))
+        self.assertEqual(replay_session_events(self.session_id, 1), (None, 4))
+
+
+@override_settings(**TEST_SETTINGS)
+class SessionConsumerResumeTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        device = Device.objects.create(name="Kiosk", serial_number="kiosk-1")
+        self.session = Session.objects.create(device=device, phone_number="998901234567")
+
+    def resume(self, session_id, last_seq):
+        async def run():
+            communicator = WebsocketCommunicator(
+                SessionConsumer.as_asgi(), f"/ws/session/{session_id}/?last_seq={last_seq}",
+            )
+            communicator.scope["url_route"] = {"kwargs": {"session_id": str(session_id)}}
+            connected, _ = await communicator.connect()
+            self.assertTrue(connected)
+            outputs = []
+            while not await communicator.receive_nothing(timeout=0.2):
+                outputs.append(await communicator.receive_output())
+            await communicator.disconnect()
+            return outputs
+
+        return async_to_sync(run)()
+
+    def frames(self, outputs):
+        return [loads(output["text"]) for output in outputs if output["type"] == "websocket.send"]
+
+    def test_small_gap_is_replayed(self):
+        publish_session_event(self.session.id, "item.scanned", {"n": 1})
+        publish_session_event(self.session.id, "item.scanned", {"n": 2})
+
+        frames = self.frames(self.resume(self.session.id, 1))
+        self.assertEqual([(frame["event"], frame["seq"]) for frame in frames], [("item_scanned", 2)])
+
+    def test_unreplayable_gap_gets_a_snapshot(self):
+        publish_session_event(self.session.id, "item.scanned", {"n": 1})
+
+        frames = self.frames(self.resume(self.session.id, 7))
+        self.assertEqual(len(frames), 1)
+        self.assertEqual(frames[0]["event"], "session_snapshot")
+        self.assertEqual(frames[0]["data"]["session_id"], self.session.id)
+
+    def test_unknown_session_is_closed(self):
+        outputs = self.resume(999999, 3)
+        self.assertEqual(self.frames(outputs)[0]["event"], "session_not_found")
+        self.assertEqual(outputs[-1], {"type": "websocket.close", "code": SESSION_NOT_FOUND_CLOSE_CODE})
+
+
+class ForwardTests(SimpleTestCase):
+    def forward(self, consumer, *seqs):
+        sent = []
+
+        async def send_frame(event):
+            sent.append(event["seq"])
+
+        consumer.send_frame = send_frame
+        for seq in seqs:
+            async_to_sync(consumer.forward)(build_event("item.scanned", {}, seq=seq))
+        return sent
+
+    def test_events_covered_by_the_replay_are_dropped(self):
+        consumer = SessionConsumer()
+        consumer.replay_head = 3
+        self.assertEqual(self.forward(consumer, 2, 3, 4), [4])
+
+    def test_racing_publishers_deliver_out_of_order(self):
+        consumer = SessionConsumer()
+        consumer.replay_head = 3
+        self.assertEqual(self.forward(consumer, 5, 4, 6), [5, 4, 6])
+
+    def test_without_resume_everything_is_forwarded(self):
+        self.assertEqual(self.forward(SessionConsumer(), 2, 1), [2, 1])
@@ -0,0 +1,90 @@
+import csv
+import io
+from datetime import datetime, timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from barcode.models import Bottle
+from device.archive import archive_batch
+from device.events import loads
+from device.exports import EXPORT_COLUMNS, iter_export_rows, parse_bound, stream_export
+from device.models import Device, Session, SessionItem
+
+from .helpers import TEST_SETTINGS
+
+
+class ParseBoundTests(SimpleTestCase):
+    def test_empty_is_no_bound(self):
+        self.assertIsNone(parse_bound(""))
+        self.assertIsNone(parse_bound(None))
+
+    def test_end_date_includes_the_whole_day(self):
+        start, end = parse_bound("2025-10-01"), parse_bound("2025-10-01", end=True)
+        self.assertEqual(end - start, timedelta(days=1))
+        self.assertTrue(timezone.is_aware(start))
+
+    def test_datetime_is_kept(self):
+        moment = parse_bound("2025-10-01T12:30:00+05:00")
+        self.assertEqual(moment, datetime.fromisoformat("2025-10-01T12:30:00+05:00"))
+
+    def test_garbage_is_rejected(self):
+        with self.assertRaises(ValueError):
+            parse_bound("yesterday")
+
+
+@override_settings(**TEST_SETTINGS)
+class ExportTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        Bottle.objects.create(size=0.5, name="Water", material="P", sku="4780000000012")
+        self.device = Device.objects.create(name="Kiosk", serial_number="kiosk-1")
+        other = Device.objects.create(name="Other", serial_number="kiosk-2")
+
+        self.archived = self.session(self.device, ["4780000000012", "4780000000029"])
+        Session.objects.filter(id=self.archived.id).update(status="inactive", end_time=timezone.now())
+        archive_batch([self.archived.id])
+        self.hot = self.session(self.device, ["4780000000012"])
+        self.other = self.session(other, ["4780000000029"])
+
+    def session(self, device, skus):
+        session = Session.objects.create(device=device, phone_number="998901234567")
+        for sku in skus:
+            SessionItem.objects.create(session=session, sku=sku)
+        return session
+
+    def test_hot_rows_come_before_archived_ones(self):
+        rows = list(iter_export_rows(device="kiosk-1"))
+        self.assertEqual([row["session_id"] for row in rows], [self.hot.id, self.archived.id, self.archived.id])
+        self.assertEqual([row["material"] for row in rows], ["P", "P", ""])
+
+    def test_start_filter(self):
+        Session.objects.filter(id=self.other.id).update(start_time=timezone.now() - timedelta(days=3))
+        rows = list(iter_export_rows(start=timezone.now() - timedelta(days=1), device="kiosk-2"))
+        self.assertEqual(rows, [])
+
+    def test_csv_stream(self):
+        text = "".join(stream_export("csv", iter_export_rows()))
+        lines = list(csv.reader(io.StringIO(text)))
+        self.assertEqual(tuple(lines[0]), EXPORT_COLUMNS)
+        self.assertEqual(len(lines), 5)
+
+    def test_ndjson_stream(self):
+        lines = "".join(stream_export("ndjson", iter_export_rows())).splitlines()
+        self.assertEqual(len(lines), 4)
+        self.assertEqual(set(loads(lines[0])), set(EXPORT_COLUMNS))
+
+    def test_http_export_is_staff_only_and_streams(self):
+        url = "/api/session/export/csv/?device=kiosk-1"
+        self.assertIn(self.client.get(url).status_code, (401, 403))
+
+        staff = get_user_model().objects.create_user("staff", password="secret", is_staff=True)
+        self.client.force_login(staff)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(len(b"".join(response.streaming_content).decode().splitlines()), 4)
+        self.assertEqual(self.client.get("/api/session/export/csv/?start=soon").status_code, 400)
+        self.assertEqual(self.client.get("/api/session/export/xml/").status_code, 404)
@@ -0,0 +1,119 @@
+import random
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from device.geo import VERSION_KEY, DeviceGeoIndex, haversine_km
+from device.models import Device
+
+from .helpers import TEST_SETTINGS
+
+
+def make_device(device_id, lat, lng):
+    return {
+        'id': device_id, 'name': f"Kiosk {device_id}", 'serial_number': f"kiosk-{device_id}",
+        'location': "", 'latitude': lat, 'longitude': lng,
+    }
+
+
+@override_settings(**TEST_SETTINGS)
+class DeviceGeoIndexTests(SimpleTestCase):
+    queries = [(41.31, 69.28), (0, 0), (89.9, 10), (-89.9, -170), (12.5, 179.9), (-33.9, -179.95)]
+
+    def setUp(self):
+        cache.clear()
+        self.random = random.Random(7)
+        self.devices = {}
+        for device_id in range(1, 501):
+            self.devices[device_id] = self.random_device(device_id)
+        self.index = DeviceGeoIndex()
+        self.index._rebuild(dict(self.devices))
+        cache.set(VERSION_KEY, 0, None)
+        self.index.version = 0
+
+    def random_device(self, device_id):
+        return make_device(device_id, self.random.uniform(-90, 90), self.random.uniform(-180, 180))
+
+    def brute_force(self, lat, lng, limit, radius_km=None):
+        found = sorted(
+            (haversine_km(lat, lng, device['latitude'], device['longitude']), device['id'])
+            for device in self.devices.values()
+        )
+        return [device_id for distance, device_id in found if radius_km is None or distance <= radius_km][:limit]
+
+    def assertMatchesBruteForce(self):
+        for lat, lng in self.queries:
+            for limit, radius_km in ((1, None), (7, None), (50, None), (50, 1500), (50, 0)):
+                found = self.index.nearest(lat, lng, limit, radius_km)
+                self.assertEqual([device['id'] for _, device in found], self.brute_force(lat, lng, limit, radius_km))
+                for distance, device in found:
+                    self.assertAlmostEqual(
+                        distance, haversine_km(lat, lng, device['latitude'], device['longitude']), places=6,
+                    )
+
+    def change(self, device_id, device=None):
+        if device is None:
+            self.devices.pop(device_id, None)
+        else:
+            self.devices[device_id] = device
+        self.index.device_changed(device_id, device)
+
+    def test_tree_matches_brute_force(self):
+        self.assertMatchesBruteForce()
+
+    def test_overlay_matches_brute_force(self):
+        for device_id in range(1, 11):
+            self.change(device_id, self.random_device(device_id))  # moved
+        for device_id in range(11, 21):
+            self.change(device_id)  # deleted
+        for device_id in range(1001, 1011):
+            self.change(device_id, self.random_device(device_id))  # added
+
+        self.assertTrue(self.index._added)
+        self.assertEqual(len(self.index), len(self.devices))
+        self.assertMatchesBruteForce()
+
+    def test_large_overlay_is_folded_into_a_new_tree(self):
+        for device_id in range(1, 101):
+            self.change(device_id, self.random_device(device_id))
+
+        self.assertLess(len(self.index._added), 64)
+        self.assertLessEqual(set(self.index._added), self.index._hidden)
+        self.assertMatchesBruteForce()
+
+    def test_change_announced_elsewhere_forces_reload(self):
+        cache.incr(VERSION_KEY)
+        self.index.device_changed(1, self.random_device(1))
+        self.assertIsNone(self.index.version)
+
+
+@override_settings(**TEST_SETTINGS)
+class DeviceNearbyViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        # One row east of Tashkent, about 850 m apart, the closest first.
+        self.devices = [
+            Device.objects.create(name=f"Kiosk {n}", serial_number=f"kiosk-{n}", location="", latitude=41.31,
+                                  longitude=69.28 + n * 0.01)
+            for n in range(12)
+        ]
+
+    def nearby(self, **params):
+        return self.client.get("/api/devices/nearby/", {"lat": 41.31, "lng": 69.28, **params})
+
+    def test_invalid_radius_is_rejected(self):
+        for radius_km in ("-1", "nan", "inf", "-inf"):
+            self.assertEqual(self.nearby(radius_km=radius_km).status_code, 400, radius_km)
+        self.assertEqual(self.nearby(radius_km="0").status_code, 200)
+
+    def test_radius_limits_the_result(self):
+        devices = self.nearby(radius_km="2").json()["devices"]
+        self.assertEqual([device["serial_number"] for device in devices], ["kiosk-0", "kiosk-1", "kiosk-2"])
+
+    def test_online_filter_widens_past_offline_neighbours(self):
+        for device in self.devices[-2:]:
+            cache.set(f"device_online:{device.serial_number}", 1)
+
+        devices = self.nearby(limit=2, online=1).json()["devices"]
+        self.assertEqual([device["serial_number"] for device in devices], ["kiosk-10", "kiosk-11"])
+        self.assertTrue(all(device["online"] for device in devices))
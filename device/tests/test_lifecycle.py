@@ -0,0 +1,134 @@
+import threading
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import OperationalError, connection
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from device.lifecycle import SESSION_IDLE_TIMEOUT, add_session_item, expire_session, stop_session
+from device.models import Device, Session
+from device.session_cache import get_session_detail
+from device.utils import resume_session_expiries
+
+from .helpers import TEST_SETTINGS, SentEvents, idle
+
+
+@override_settings(**TEST_SETTINGS)
+class SessionLifecycleTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.device = Device.objects.create(name="Kiosk", serial_number="kiosk-1")
+        self.session = Session.objects.create(device=self.device, phone_number="998901234567")
+        self.sent = SentEvents()
+        patcher = mock.patch("device.events._group_send", self.sent)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_stop_winner_uses_two_queries(self):
+        # The conditional UPDATE and one joined SELECT for the broadcast.
+        with self.assertNumQueries(2), self.captureOnCommitCallbacks(execute=True):
+            self.assertIsNotNone(stop_session(self.session.id))
+        self.assertEqual(self.sent.count(f"device_{self.device.serial_number}", "session.stopped"), 1)
+        self.assertEqual(self.sent.count(f"session_{self.session.id}", "session.stopped"), 1)
+
+    def test_stop_loser_uses_one_query_and_publishes_nothing(self):
+        stop_session(self.session.id)
+        self.sent.sent.clear()
+
+        with self.assertNumQueries(1):
+            self.assertIsNone(stop_session(self.session.id))
+        self.assertEqual(self.sent.sent, [])
+
+    def test_expire_winner_uses_two_queries(self):
+        idle(self.session)
+        with self.assertNumQueries(2):
+            self.assertIsNotNone(expire_session(self.session.id))
+        self.assertEqual(self.sent.count(f"session_{self.session.id}", "session.stopped"), 1)
+
+    def test_expire_loser_uses_one_query_when_not_idle(self):
+        with self.assertNumQueries(1):
+            self.assertIsNone(expire_session(self.session.id))
+        self.assertEqual(Session.objects.get(id=self.session.id).status, "active")
+        self.assertEqual(self.sent.sent, [])
+
+    def test_timeout_after_stop_announces_nothing(self):
+        idle(self.session)
+        stop_session(self.session.id)
+        self.assertIsNone(expire_session(self.session.id))
+        self.assertEqual(self.sent.count(f"session_{self.session.id}", "session.stopped"), 1)
+
+    def test_no_item_is_added_to_a_closed_session(self):
+        get_session_detail(self.session.id)
+        stop_session(self.session.id)
+
+        self.assertIsNone(add_session_item(self.session.id, "4780000000012"))
+        self.assertEqual(self.session.items.count(), 0)
+        self.assertEqual(get_session_detail(self.session.id)["status"], "inactive")
+
+
+    def test_resume_closes_idle_sessions_and_reschedules_the_rest(self):
+        fresh = Session.objects.create(device=self.device, phone_number="998907654321")
+        for session in (self.session, fresh):
+            add_session_item(session.id, "4780000000012")
+        idle(self.session)
+
+        with mock.patch("device.utils.schedule_session_auto_close") as schedule:
+            self.assertEqual(resume_session_expiries(), (1, 1))
+        self.assertEqual(Session.objects.get(id=self.session.id).status, "inactive")
+        (session_id,), kwargs = schedule.call_args
+        self.assertEqual(session_id, fresh.id)
+        self.assertGreater(kwargs["delay"], SESSION_IDLE_TIMEOUT - 5)
+
+@override_settings(**TEST_SETTINGS)
+class SessionStopRaceTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.device = Device.objects.create(name="Kiosk", serial_number="kiosk-1")
+        self.sent = SentEvents()
+        patcher = mock.patch("device.events._group_send", self.sent)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def race(self, *calls):
+        barrier = threading.Barrier(len(calls))
+        results = [None] * len(calls)
+        errors = []
+
+        def run(index, call):
+            try:
+                barrier.wait()
+                for attempt in range(50):
+                    try:
+                        results[index] = call()
+                        return
+                    except OperationalError as e:
+                        # The in-memory test database locks whole tables instead of waiting.
+                        if "locked" not in str(e) or attempt == 49:
+                            raise
+                        time.sleep(0.01)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=run, args=(index, call)) for index, call in enumerate(calls)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if errors:
+            raise errors[0]
+        return results
+
+    def test_stop_racing_timeout_announces_once(self):
+        for _ in range(10):
+            self.sent.sent.clear()
+            session = Session.objects.create(device=self.device, phone_number="998901234567")
+            idle(session)
+
+            results = self.race(lambda: stop_session(session.id), lambda: expire_session(session.id))
+
+            self.assertEqual(sum(result is not None for result in results), 1)
+            self.assertEqual(self.sent.count(f"session_{session.id}", "session.stopped"), 1)
+            self.assertEqual(self.sent.count(f"device_{self.device.serial_number}", "session.stopped"), 1)
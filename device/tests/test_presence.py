@@ -0,0 +1,43 @@
+import asyncio
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+from device import presence
+from device.presence import keep_online, mark_offline, mark_online, online_serials
+
+from .helpers import TEST_SETTINGS
+
+
+@override_settings(**TEST_SETTINGS)
+class PresenceTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_late_disconnect_of_a_replaced_socket_keeps_device_online(self):
+        async_to_sync(mark_online)("kiosk-1")
+        async_to_sync(mark_online)("kiosk-1")
+        async_to_sync(mark_offline)("kiosk-1")
+        self.assertEqual(online_serials(["kiosk-1", "kiosk-2"]), {"kiosk-1"})
+
+        async_to_sync(mark_offline)("kiosk-1")
+        self.assertEqual(online_serials(["kiosk-1"]), set())
+
+    def test_connect_repairs_a_negative_count(self):
+        cache.set("device_online:kiosk-1", -1)
+        async_to_sync(mark_online)("kiosk-1")
+        self.assertEqual(online_serials(["kiosk-1"]), {"kiosk-1"})
+
+    def test_open_socket_restores_an_expired_entry(self):
+        async def run():
+            with mock.patch.object(presence, "DEVICE_ONLINE_HEARTBEAT", 0.01):
+                task = asyncio.ensure_future(keep_online("kiosk-1"))
+                await asyncio.sleep(0.05)
+                task.cancel()
+
+        async_to_sync(mark_online)("kiosk-1")
+        cache.delete("device_online:kiosk-1")
+        async_to_sync(run)()
+        self.assertEqual(online_serials(["kiosk-1"]), {"kiosk-1"})
@@ -0,0 +1,81 @@
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from channels.testing import WebsocketCommunicator
+from django.core.cache import cache
+from django.core.management import CommandError
+from django.test import SimpleTestCase, override_settings
+
+from config import warmup
+from device.consumers import SERVICE_RESTART_CLOSE_CODE, DeviceConsumer, close_streams
+from device.management.commands.serve import DEFAULT_EXPIRE_INTERVAL, Command
+from device.presence import online_serials
+
+from .helpers import TEST_SETTINGS
+
+SHARED_SETTINGS = {
+    "CHANNEL_LAYERS": {"default": {"BACKEND": "channels_redis.core.RedisChannelLayer"}},
+    "CACHES": {"default": {"BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": "redis://"}},
+}
+
+
+class ExpireSweepOptionTests(SimpleTestCase):
+    def interval(self, value):
+        command = Command()
+        command.options = {"expire_interval": value}
+        command.configure_sweep()
+        return command.options["expire_interval"]
+
+    @override_settings(**TEST_SETTINGS)
+    def test_sweep_is_off_by_default_without_shared_state(self):
+        self.assertEqual(self.interval(None), 0)
+
+    @override_settings(**TEST_SETTINGS)
+    def test_explicit_sweep_needs_shared_state(self):
+        with self.assertRaisesMessage(CommandError, "channel layer"):
+            self.interval(10)
+        self.assertEqual(self.interval(0), 0)
+
+    @override_settings(**SHARED_SETTINGS)
+    def test_sweep_runs_with_shared_state(self):
+        self.assertEqual(self.interval(None), DEFAULT_EXPIRE_INTERVAL)
+        self.assertEqual(self.interval(10), 10)
+
+
+@override_settings(**TEST_SETTINGS)
+class DrainTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(warmup._draining.clear)
+
+    def device_socket(self, before_output=None):
+        """Connect a device socket, run `before_output` and return the first frame the server sends."""
+        async def run():
+            communicator = WebsocketCommunicator(DeviceConsumer.as_asgi(), "/ws/device/kiosk-1/")
+            communicator.scope["url_route"] = {"kwargs": {"serial_number": "kiosk-1"}}
+            connected, _ = await communicator.connect()
+            self.assertTrue(connected)
+            if before_output:
+                await before_output()
+            output = await communicator.receive_output()
+            await communicator.disconnect()
+            return output
+
+        return async_to_sync(run)()
+
+    def test_open_sockets_are_closed_for_a_restart(self):
+        output = self.device_socket(close_streams)
+        self.assertEqual(output, {"type": "websocket.close", "code": SERVICE_RESTART_CLOSE_CODE})
+
+    def test_new_sockets_are_turned_away_while_draining(self):
+        warmup._draining.set()
+        output = self.device_socket()
+        self.assertEqual(output, {"type": "websocket.close", "code": SERVICE_RESTART_CLOSE_CODE})
+        self.assertEqual(online_serials(["kiosk-1"]), set())
+
+    def test_draining_worker_is_not_ready(self):
+        warmup._draining.set()
+        with mock.patch.object(warmup, "is_ready", return_value=True):
+            response = self.client.get("/healthz/ready")
+        self.assertEqual(response.status_code, 503)
+        self.assertTrue(response.json()["draining"])
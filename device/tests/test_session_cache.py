@@ -0,0 +1,102 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from device import session_cache
+from device.lifecycle import add_session_item, stop_session
+from device.models import Device, Session
+from device.session_cache import get_session_detail
+
+from .helpers import TEST_SETTINGS
+
+
+@override_settings(**TEST_SETTINGS)
+class SessionDetailCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.device = Device.objects.create(name="Kiosk", serial_number="kiosk-1")
+        self.session = Session.objects.create(device=self.device, phone_number="998901234567")
+        patcher = mock.patch("device.events._group_send")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def skus(self):
+        return [item["sku"] for item in get_session_detail(self.session.id)["items"]]
+
+    def test_second_read_is_served_from_the_cache(self):
+        get_session_detail(self.session.id)
+        with self.assertNumQueries(0):
+            get_session_detail(self.session.id)
+
+    def test_scan_after_a_reload_is_listed_once(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            add_session_item(self.session.id, "4780000000012")
+        # Nothing cached yet: this read loads the session with the new item already in it.
+        self.assertEqual(self.skus(), ["4780000000012"])
+
+        for callback in callbacks:
+            callback()
+        self.assertEqual(self.skus(), ["4780000000012"])
+
+    def test_load_racing_a_stop_is_not_kept(self):
+        load = session_cache.load_session_detail
+
+        def load_then_stop(session_id):
+            payload = load(session_id)
+            stop_session(session_id)
+            return payload
+
+        with mock.patch("device.session_cache.load_session_detail", load_then_stop):
+            self.assertEqual(get_session_detail(self.session.id)["status"], "active")
+        self.assertEqual(get_session_detail(self.session.id)["status"], "inactive")
+
+    def test_admin_edit_invalidates_closed_session_detail(self):
+        stop_session(self.session.id)
+        self.assertEqual(get_session_detail(self.session.id)["phone_number"], "998901234567")
+
+        session = Session.objects.get(id=self.session.id)
+        session.phone_number = "998907654321"
+        with self.captureOnCommitCallbacks(execute=True):
+            session.save()
+        self.assertEqual(get_session_detail(self.session.id)["phone_number"], "998907654321")
+
+
+@override_settings(**TEST_SETTINGS)
+class SessionDetailViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        device = Device.objects.create(name="Kiosk", serial_number="kiosk-1")
+        self.session = Session.objects.create(device=device, phone_number="998901234567")
+        self.url = f"/api/session/{self.session.id}/"
+        patcher = mock.patch("device.events._group_send")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_matching_etag_gets_304(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Cache-Control"], "private, no-cache")
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+
+    def test_scan_changes_the_etag(self):
+        etag = self.client.get(self.url)["ETag"]
+        with self.captureOnCommitCallbacks(execute=True):
+            add_session_item(self.session.id, "4780000000012")
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(len(response.json()["session"]["items"]), 1)
+
+    def test_closed_session_is_immutable(self):
+        stop_session(self.session.id)
+        response = self.client.get(self.url)
+        self.assertEqual(response["Cache-Control"], "private, max-age=31536000, immutable")
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH="*").status_code, 304)
+
+    def test_unknown_session_is_404(self):
+        self.assertEqual(self.client.get("/api/session/999999/").status_code, 404)
@@ -1,9 +1,11 @@
 from django.urls import path
-from .views import CreateNewsSessionAPIView, StopSessionAPIView, SessionDetailAPIView, SessionCreateItemAPIView
+from .views import CreateNewsSessionAPIView, StopSessionAPIView, SessionDetailAPIView, SessionCreateItemAPIView, SessionExportAPIView, DeviceNearbyAPIView
 
 urlpatterns = [
+    path('devices/nearby/', DeviceNearbyAPIView.as_view(), name='nearby_devices'),
     path('session/create/', CreateNewsSessionAPIView.as_view(), name='create_news_session'),
     path('session/stop/', StopSessionAPIView.as_view(), name='stop_session'),
     path('session/<int:session_id>/', SessionDetailAPIView.as_view(), name='get_session'),
     path('session/<int:session_id>/items/', SessionCreateItemAPIView.as_view(), name='create_session_item'),
+    path('session/export/<str:export_format>/', SessionExportAPIView.as_view(), name='export_sessions'),
 ]
\ No newline at end of file
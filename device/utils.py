@@ -1,48 +1,32 @@
 import threading
+
 from django.utils import timezone
-from channels.layers import get_channel_layer
-from asgiref.sync import async_to_sync
+
+from .lifecycle import SESSION_IDLE_TIMEOUT, expire_idle_sessions, expire_session, scanned_active_sessions
 
 
-def schedule_session_auto_close(session):
+def schedule_session_auto_close(session_id, delay=SESSION_IDLE_TIMEOUT):
     def check_and_close():
-        threading.Timer(60, perform_check).start()
+        threading.Timer(delay, perform_check).start()
 
     def perform_check():
-        from .models import Session
-        try:
-            refreshed = Session.objects.get(id=session.id)
-            if refreshed.status == 'active' and (timezone.now() - refreshed.last_activity).total_seconds() >= 60:
-                refreshed.status = 'inactive'
-                refreshed.end_time = timezone.now()
-                refreshed.save(update_fields=['status', 'end_time'])
-
-                channel_layer = get_channel_layer()
-                async_to_sync(channel_layer.group_send)(
-                    f"session_{refreshed.id}",
-                    {
-                        "type": "session.stopped",
-                        "message": {
-                            "session_id": refreshed.id,
-                            "status": refreshed.status,
-                            "reason": "timeout",
-                        },
-                    }
-                )
-                async_to_sync(channel_layer.group_send)(
-                    f"device_{refreshed.device.serial_number}",
-                    {
-                        "type": "session.stopped",
-                        "message": {
-                            "session_id": refreshed.id,
-                            "phone_number": refreshed.phone_number,
-                            "device": refreshed.device.name,
-                            "status": refreshed.status,
-                            "reason": "timeout",
-                        },
-                    }
-                )
-        except Session.DoesNotExist:
-            pass
+        expire_session(session_id)
 
     check_and_close()
+
+
+def resume_session_expiries():
+    """
+    Timers live in the process that scheduled them, so a restart loses them.
+
+    Close the sessions that went idle in the meantime and restart the timers of
+    the others for whatever is left of their idle window.
+    """
+    expired = expire_idle_sessions()
+    now = timezone.now()
+    sessions = list(scanned_active_sessions().values_list('id', 'last_activity'))
+    for session_id, last_activity in sessions:
+        remaining = SESSION_IDLE_TIMEOUT - (now - last_activity).total_seconds()
+        # One second of slack so the timer never fires just before the session counts as idle.
+        schedule_session_auto_close(session_id, delay=max(0, remaining) + 1)
+    return len(expired), len(sessions)
@@ -1,11 +1,27 @@
-from channels.layers import get_channel_layer
-from asgiref.sync import async_to_sync
+import logging
+import math
+
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from rest_framework.authentication import SessionAuthentication
+from rest_framework.permissions import IsAdminUser
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from .models import Device, Session
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from .models import Device, Session, SessionItem
 from .serializers import SessionItemSerializer
-from django.utils import timezone
+from django.utils.http import parse_etags
 from .utils import schedule_session_auto_close
+from .session_cache import get_session_detail_entry
+from .lifecycle import add_session_item, stop_session
+from .debounce import forget_scan, is_duplicate_scan
+from .events import publish_device_event, publish_session_event
+from .geo import device_index
+from .presence import online_serials
+from .exports import EXPORT_FORMATS, aiter_chunks, iter_export_rows, parse_bound, stream_export
+
+logger = logging.getLogger(__name__)
+
 
 class CreateNewsSessionAPIView(APIView):
     def post(self, request, format=None):
@@ -16,19 +32,12 @@ class CreateNewsSessionAPIView(APIView):
             device = Device.objects.get(serial_number=serial_number)
             session = Session.objects.create(device=device, phone_number=phone_number)
 
-            channel_layer = get_channel_layer()
-            async_to_sync(channel_layer.group_send)(
-                f"device_{device.serial_number}",
-                {
-                    "type": "session.created",
-                    "message": {
-                        "session_id": session.id,
-                        "phone_number": phone_number,
-                        "device": device.name,
-                        "status": session.status,
-                    },
-                }
-            )
+            publish_device_event(device.serial_number, "session.created", {
+                "session_id": session.id,
+                "phone_number": phone_number,
+                "device": device.name,
+                "status": session.status,
+            })
 
             return Response({'success': True, 'session_id': session.id})
 
@@ -40,103 +49,145 @@ class StopSessionAPIView(APIView):
     def post(self, request, format=None):
         session_id = request.data.get('session_id')
 
-        try:
-            session = Session.objects.get(id=session_id)
-
-            if session.status == 'inactive':
+        if stop_session(session_id) is None:
+            if Session.objects.filter(id=session_id).exists():
                 return Response({'success': False, 'error': 'Session already inactive'}, status=409)
-
-            session.end_time = timezone.now()
-            session.status = 'inactive'
-            session.save()
-
-            channel_layer = get_channel_layer()
-
-            async_to_sync(channel_layer.group_send)(
-                f"device_{session.device.serial_number}",
-                {
-                    "type": "session.stopped",
-                    "message": {
-                        "session_id": session.id,
-                        "phone_number": session.phone_number,
-                        "device": session.device.name,
-                        "status": session.status,
-                    },
-                }
-            )
-
-            async_to_sync(channel_layer.group_send)(
-                f"session_{session.id}",
-                {
-                    "type": "session.stopped",
-                    "message": {
-                        "session_id": session.id,
-                        "status": session.status,
-                    },
-                }
-            )
-
-            return Response({'success': True})
-
-        except Session.DoesNotExist:
             return Response({'success': False, 'error': 'Session not found'}, status=404)
-        
+
+        return Response({'success': True})
 
 
 class SessionDetailAPIView(APIView):
     def get(self, request, session_id, format=None):
-        try:
-            session = Session.objects.get(id=session_id)
-            items = session.items.all().values('sku', 'timestamp', 'score')
-            session_data = {
-                'session_id': session.id,
-                'device': session.device.name,
-                'phone_number': session.phone_number,
-                'status': session.status,
-                'start_time': session.start_time,
-                'end_time': session.end_time,
-                'items': list(items),
-            }
-            return Response({'success': True, 'session': session_data})
-
-        except Session.DoesNotExist:
+        entry = get_session_detail_entry(session_id)
+        if entry is None:
             return Response({'success': False, 'error': 'Session not found'}, status=404)
+
+        if entry['session']['status'] == 'inactive':
+            cache_control = 'private, max-age=31536000, immutable'
+        else:
+            cache_control = 'private, no-cache'
+        headers = {'ETag': entry['etag'], 'Cache-Control': cache_control}
+
+        if_none_match = parse_etags(request.headers.get('If-None-Match', ''))
+        if entry['etag'] in if_none_match or '*' in if_none_match:
+            return Response(status=304, headers=headers)
+
+        return Response({'success': True, 'session': entry['session']}, headers=headers)
         
 class SessionCreateItemAPIView(APIView):
     def post(self, request, session_id, format=None):
         sku = request.data.get('sku')
 
-        try:
-            session = Session.objects.get(id=session_id)
+        if is_duplicate_scan(session_id, sku):
+            logger.debug("Duplicate scan of %s in session %s dropped", sku, session_id)
+            return Response({'success': True, 'duplicate': True, 'session_id': session_id})
 
-            if session.status != 'active':
+        try:
+            response = self.record_scan(session_id, sku)
+        except Exception:
+            forget_scan(session_id, sku)
+            raise
+        if not response.data['success']:
+            forget_scan(session_id, sku)
+        return response
+
+    def record_scan(self, session_id, sku):
+        item = add_session_item(session_id, sku)
+        if item is None:
+            if Session.objects.filter(id=session_id).exists():
                 return Response({'success': False, 'error': 'Session is inactive'}, status=409)
+            return Response({'success': False, 'error': 'Session not found'}, status=404)
 
-            item = session.items.create(sku=sku)
-
-            items_data = SessionItemSerializer(session.items.all(), many=True).data
-
-            session.update_activity()  
-            schedule_session_auto_close(session)
-
-            channel_layer = get_channel_layer()
-            async_to_sync(channel_layer.group_send)(
-                f"session_{session.id}",
-                {
-                    "type": "item.scanned",
-                    "message": {
-                        "session_id": session.id,
-                        "items": items_data,
-                        "total_items": len(items_data),
-                    },
-                }
-            )
-
-            return Response({
-                'success': True,
-                'item_id': item.id,
-                'session_id': session.id
-            })
+        items_data = SessionItemSerializer(SessionItem.objects.filter(session_id=session_id), many=True).data
+        schedule_session_auto_close(session_id)
+
+        publish_session_event(session_id, "item.scanned", {
+            "session_id": session_id,
+            "items": items_data,
+            "total_items": len(items_data),
+        })
+
+        return Response({
+            'success': True,
+            'item_id': item.id,
+            'session_id': session_id
+        })
+
+
+class SessionExportAPIView(APIView):
+    authentication_classes = [JWTAuthentication, SessionAuthentication]
+    permission_classes = [IsAdminUser]
+
+    content_types = {
+        'csv': 'text/csv; charset=utf-8',
+        'ndjson': 'application/x-ndjson',
+    }
+
+    def get(self, request, export_format, format=None):
+        if export_format not in EXPORT_FORMATS:
+            return Response({'success': False, 'error': 'Unknown export format'}, status=404)
 
-        except Session.DoesNotExist:
-            return Response({'success': False, 'error': 'Session not found'}, status=404)
\ No newline at end of file
+        try:
+            start = parse_bound(request.query_params.get('start'))
+            end = parse_bound(request.query_params.get('end'), end=True)
+        except ValueError as e:
+            return Response({'success': False, 'error': str(e)}, status=400)
+
+        rows = iter_export_rows(start, end, request.query_params.get('device'))
+        chunks = stream_export(export_format, rows)
+        if isinstance(request._request, ASGIRequest):
+            chunks = aiter_chunks(chunks)
+
+        response = StreamingHttpResponse(chunks, content_type=self.content_types[export_format])
+        response['Content-Disposition'] = f'attachment; filename="sessions.{export_format}"'
+        return response
+
+
+class DeviceNearbyAPIView(APIView):
+    max_limit = 100
+
+    def get(self, request, format=None):
+        try:
+            lat = float(request.query_params['lat'])
+            lng = float(request.query_params['lng'])
+            limit = min(int(request.query_params.get('limit', 10)), self.max_limit)
+            radius_km = request.query_params.get('radius_km')
+            radius_km = float(radius_km) if radius_km else None
+        except (KeyError, ValueError):
+            return Response({'success': False, 'error': 'lat and lng are required numbers'}, status=400)
+
+        if not (-90 <= lat <= 90 and -180 <= lng <= 180) or limit < 1:
+            return Response({'success': False, 'error': 'Coordinates or limit out of range'}, status=400)
+        if radius_km is not None and not (math.isfinite(radius_km) and radius_km >= 0):
+            return Response({'success': False, 'error': 'radius_km must be a non-negative number'}, status=400)
+
+        online_only = request.query_params.get('online') in ('1', 'true')
+
+        device_index.ensure_current()
+        if online_only:
+            nearest, online = self.nearest_online(lat, lng, limit, radius_km)
+        else:
+            nearest = device_index.nearest(lat, lng, limit, radius_km)
+            online = online_serials([device['serial_number'] for _, device in nearest])
+
+        devices = []
+        for distance, device in nearest:
+            is_online = device['serial_number'] in online
+            if online_only and not is_online:
+                continue
+            devices.append({**device, 'distance_km': round(distance, 3), 'online': is_online})
+
+        return Response({'success': True, 'devices': devices[:limit]})
+
+    def nearest_online(self, lat, lng, limit, radius_km):
+        """Widen the lookup until it holds `limit` online devices or runs out of candidates."""
+        fetch, online, checked = limit * 4, set(), set()
+        while True:
+            nearest = device_index.nearest(lat, lng, fetch, radius_km)
+            serials = [device['serial_number'] for _, device in nearest]
+            online |= online_serials([serial for serial in serials if serial not in checked])
+            checked.update(serials)
+            if len(online) >= limit or len(nearest) < fetch:
+                return nearest, online
+            fetch *= 4